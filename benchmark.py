@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+from contextlib import redirect_stdout
+import mock_srs_server
+import test_registration as tr
+
+MODES = ["sequential", "pooled", "batched", "concurrent"]
+DEFAULT_SIZES = [1, 10, 100]
+DEFAULT_REPEATS = 10
+DEFAULT_LATENCY = "lognormal:40:0.4"
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of values (pct in 0-100)."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+def run_once(mode: str, crns: list[str], term: str, max_inflight: int, run_id: int) -> tuple[float, float]:
+    """Runs one registration pass. Returns (seconds to first submit response, total seconds)."""
+    first_submit = []
+    original_submit_body = tr.submit_body
+
+    def _timed_submit_body(body, verbose=False):
+        result = original_submit_body(body, verbose=verbose)
+        if not first_submit:
+            first_submit.append(time.perf_counter())
+        return result
+
+    # A fresh cookie per run so the mock server doesn't answer "Duplicate CRN"
+    tr.HEADERS['Cookie'] = f"bench={run_id}"
+    tr.LOG_BUFFER.clear()
+    tr.MODEL_CACHE.clear()
+    tr.FIRST_REQUEST_AT = None
+    tr.INFLIGHT_LIMIT = threading.BoundedSemaphore(max_inflight) if mode == "concurrent" else None
+    if mode == "sequential":
+        tr.SESSION = None  # the original bare requests.post path
+    else:
+        pool = max_inflight if mode == "concurrent" else tr.DEFAULT_POOL_SIZE
+        tr.SESSION = tr.build_session(pool)
+        tr.warm_session(tr.SESSION, pool)
+
+    tr.submit_body = _timed_submit_body
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            start = time.perf_counter()
+            if mode in ("sequential", "pooled"):
+                for crn in crns:
+                    tr.register_crn(crn, term)
+            elif mode == "batched":
+                tr.run_batched([[crn] for crn in crns], term)
+            else:
+                tr.run_groups([[crn] for crn in crns], term)
+            end = time.perf_counter()
+    finally:
+        tr.submit_body = original_submit_body
+        if tr.SESSION:
+            tr.SESSION.close()
+    first = (first_submit[0] - start) if first_submit else float("nan")
+    return first, end - start
+
+def summarize(first_times: list[float], totals: list[float], n_crns: int) -> dict:
+    return {
+        "runs": len(totals),
+        "first_submit_ms": {
+            "p50": round(percentile(first_times, 50) * 1000, 2),
+            "p95": round(percentile(first_times, 95) * 1000, 2),
+            "p99": round(percentile(first_times, 99) * 1000, 2),
+        },
+        "total_ms_p50": round(percentile(totals, 50) * 1000, 2),
+        "crns_per_second": round(n_crns / percentile(totals, 50), 2) if totals else 0.0,
+    }
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def compare(previous: dict, current: dict, threshold: float) -> list[str]:
+    """Lists cases whose p95 time-to-first-submit or throughput got worse by more than threshold (fraction)."""
+    regressions = []
+    for key, now in current["results"].items():
+        before = previous.get("results", {}).get(key)
+        if not before:
+            continue
+        p95_before, p95_now = before["first_submit_ms"]["p95"], now["first_submit_ms"]["p95"]
+        if p95_before and p95_now > p95_before * (1 + threshold):
+            regressions.append(f"{key}: first-submit p95 {p95_before:.1f} -> {p95_now:.1f} ms")
+        tput_before, tput_now = before["crns_per_second"], now["crns_per_second"]
+        if tput_before and tput_now < tput_before * (1 - threshold):
+            regressions.append(f"{key}: throughput {tput_before:.1f} -> {tput_now:.1f} CRN/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-submit benchmark against a local mock SRS server")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes to run (default {','.join(MODES)})")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES), help="Comma-separated CRN list sizes (default 1,10,100)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help=f"Runs per mode and size (default {DEFAULT_REPEATS})")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help=f"Mock server latency distribution in ms (default {DEFAULT_LATENCY})")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server 503 rate (default 0)")
+    parser.add_argument("--max-inflight", type=int, default=16, help="In-flight cap for concurrent mode (default 16)")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write machine-readable results (default bench_results.json)")
+    parser.add_argument("--compare", help="Previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold as a fraction (default 0.10)")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        print(f"Unknown mode(s): {', '.join(unknown)}")
+        sys.exit(1)
+    sizes = [int(n) for n in args.sizes.split(",") if n.strip()]
+
+    server, state, base_url = mock_srs_server.start_mock_server(
+        latency=args.latency, error_rate=args.error_rate, default_seats=10**9)
+    # Throwaway credentials: the credential store is never read or touched by a benchmark run
+    tr.apply_credentials({"COOKIE": "bench=1", "TOKEN": "bench-token", "SESSION_ID": "bench-session"})
+    tr.BASE_URL = base_url
+    term = "209901"
+
+    report = {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "repeats": args.repeats,
+        "results": {},
+    }
+    run_id = 0
+    print(f"{'case':<22}{'p50':>10}{'p95':>10}{'p99':>10}{'CRN/s':>10}")
+    try:
+        for size in sizes:
+            crns = [str(10000 + i) for i in range(size)]
+            for mode in modes:
+                first_times, totals = [], []
+                for _ in range(args.repeats):
+                    run_id += 1
+                    first, total = run_once(mode, crns, term, args.max_inflight, run_id)
+                    first_times.append(first)
+                    totals.append(total)
+                key = f"{mode}/{size}"
+                summary = summarize(first_times, totals, size)
+                report["results"][key] = summary
+                fs = summary["first_submit_ms"]
+                print(f"{key:<22}{fs['p50']:>8.1f}ms{fs['p95']:>8.1f}ms{fs['p99']:>8.1f}ms{summary['crns_per_second']:>10.1f}")
+    finally:
+        server.shutdown()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output} (first-submit times; CRN/s uses the median run)")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare(previous, report, args.threshold)
+        if regressions:
+            print(f"\nRegressions vs {args.compare} (revision {previous.get('revision', '?')}):")
+            for line in regressions:
+                print(f" - {line}")
+            sys.exit(2)
+        print(f"\nNo regressions vs {args.compare} beyond {args.threshold:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+import requests
+import credentials
+import fetch_srs_config as fsc
+
+DEFAULT_SERVE_PORT = 8765
+DEFAULT_REFRESH_INTERVAL = 300.0
+
+def debug_port_alive(port: int) -> bool:
+    """True if an Edge instance is already listening for DevTools on this port."""
+    try:
+        return requests.get(f"http://127.0.0.1:{port}/json/version", timeout=1).ok
+    except requests.exceptions.RequestException:
+        return False
+
+def fetch_from_pool(pool_url: str, name: str = "", timeout: float = 5) -> dict:
+    """Asks a running browser pool for freshly extracted credentials.
+       Returns a credential store entry (COOKIE, TOKEN, SESSION_ID, EXTRACTED_AT, TERM, ...).
+    """
+    url = f"{pool_url.rstrip('/')}/credentials"
+    if name:
+        url += f"/{name}"
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+class PrimedBrowser:
+    """One resident Edge for one profile, attached over its --remote-debugging-port
+       and kept on the primed registration workspace.
+    """
+
+    def __init__(self, name: str, term: str, debug_port: int, user_data_dir: str = "",
+                 profile_directory: str = "", email: str = "", edge_driver: str = "",
+                 output: str = "", head: bool = False):
+        self.name = name
+        self.term = term
+        self.debug_port = int(debug_port)
+        self.user_data_dir = user_data_dir
+        self.profile_directory = profile_directory
+        self.email = email
+        self.edge_driver = edge_driver
+        self.output = output or credentials.STORE_PATH
+        self.head = head
+        self.driver = None
+        self.process = None
+        self.last_credentials = None
+        # WebDriver sessions are not thread safe; serialize extraction and refreshes
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Launches Edge with remote debugging (unless it is already running), attaches and primes it."""
+        if not debug_port_alive(self.debug_port):
+            edge = fsc.find_edge_binary()
+            if not edge:
+                raise RuntimeError("Microsoft Edge executable not found; start Edge with --remote-debugging-port yourself")
+            user_data_dir = self.user_data_dir or fsc.get_edge_user_data_dir()
+            profile_dir = self.profile_directory
+            if not profile_dir:
+                profile_dir = fsc.find_profile_directory(user_data_dir, self.email) if self.email else "Default"
+            cmd = [edge, f"--remote-debugging-port={self.debug_port}",
+                   f"--user-data-dir={user_data_dir}", f"--profile-directory={profile_dir}"]
+            if not self.head:
+                cmd.append("--headless=new")
+            print(f"[{self.name}] Launching Edge on debug port {self.debug_port}...")
+            self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            deadline = time.monotonic() + 30
+            while not debug_port_alive(self.debug_port):
+                if time.monotonic() > deadline or self.process.poll() is not None:
+                    raise RuntimeError(f"Edge did not open debug port {self.debug_port}")
+                time.sleep(0.2)
+
+        fsc.load_selenium()
+        options = fsc.EdgeOptions()
+        options.add_experimental_option("debuggerAddress", f"127.0.0.1:{self.debug_port}")
+        self.driver = fsc.webdriver.Edge(service=fsc.resolve_edge_service(self.edge_driver), options=options)
+        with self.lock:
+            self._prime()
+            self._extract()
+
+    def _prime(self):
+        print(f"[{self.name}] Priming registration workspace for {self.term}...")
+        fsc.navigate_to_workspace(self.driver, self.term, interactive=False)
+
+    def _workspace_loaded(self) -> bool:
+        try:
+            return bool(self.driver.find_elements(fsc.By.CSS_SELECTOR, ".search-panel, #search-go"))
+        except Exception:
+            return False
+
+    def _extract(self) -> dict:
+        start = time.perf_counter()
+        extracted = fsc.extract_credentials(self.driver)
+        self.last_credentials = credentials.save_credentials(
+            extracted["cookie"], extracted["token"], extracted["session_id"], term=self.term,
+            profile=self.name, path=self.output, email=self.email or None,
+            profile_directory=self.profile_directory or None, source="browser_pool")
+        print(f"[{self.name}] Extracted credentials in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return self.last_credentials
+
+    def extract(self) -> dict:
+        """Re-reads cookies, synchronizer token and session ID from the live page."""
+        with self.lock:
+            if not self._workspace_loaded():
+                self._prime()
+            return self._extract()
+
+    def refresh(self):
+        """Reloads the workspace so the Banner session never idles out, re-priming if it was lost."""
+        with self.lock:
+            try:
+                self.driver.refresh()
+                fsc.wait_for_page_ready(self.driver, timeout=30)
+            except Exception as e:
+                print(f"[{self.name}] Refresh failed ({e})")
+            if not self._workspace_loaded():
+                print(f"[{self.name}] Workspace lost after refresh, priming again...")
+                self._prime()
+            self._extract()
+
+    def close(self):
+        if self.driver:
+            try:
+                # Only detach; the browser is closed below if we launched it
+                self.driver.service.stop()
+            except Exception:
+                pass
+            self.driver = None
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+def refresh_loop(browsers: list[PrimedBrowser], interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        for browser in browsers:
+            try:
+                browser.refresh()
+            except Exception as e:
+                print(f"[{browser.name}] Scheduled refresh failed: {e}")
+
+def make_handler(browsers: dict):
+    class PoolHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = [p for p in urlparse(self.path).path.split("/") if p]
+            if parts == ["status"]:
+                self._send_json(200, {name: {"term": b.term, "debug_port": b.debug_port,
+                                             "extracted_at": (b.last_credentials or {}).get("EXTRACTED_AT")}
+                                      for name, b in browsers.items()})
+                return
+            if not parts or parts[0] != "credentials":
+                self._send_json(404, {"error": "use /credentials/<name> or /status"})
+                return
+            if len(parts) > 1:
+                browser = browsers.get(parts[1])
+            elif len(browsers) == 1:
+                browser = next(iter(browsers.values()))
+            else:
+                browser = None
+            if not browser:
+                self._send_json(404, {"error": "unknown profile", "profiles": list(browsers)})
+                return
+            try:
+                self._send_json(200, browser.extract())
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+    return PoolHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep primed Edge sessions alive and re-extract SRS credentials on demand")
+    parser.add_argument("--accounts", help="Accounts JSON (orchestrator format); each needs name, term_name and debug_port")
+    parser.add_argument("--term", help="Term to select for a single profile (e.g. 'Spring Semester 2026')")
+    parser.add_argument("--debug-port", type=int, default=9222, help="Remote debugging port for a single profile (default 9222)")
+    parser.add_argument("--email", help="Profile email for a single profile")
+    parser.add_argument("--user-data-dir", help="Edge user data directory for a single profile")
+    parser.add_argument("--profile-directory", help="Edge profile directory for a single profile")
+    parser.add_argument("--edge-driver", help="Edge driver path")
+    parser.add_argument("--output", default=credentials.STORE_PATH, help=f"Credential store shared by all profiles, each under its account name (default {credentials.STORE_PATH})")
+    parser.add_argument("--head", action="store_true", help="Launch visible browsers instead of headless")
+    parser.add_argument("--serve-port", type=int, default=DEFAULT_SERVE_PORT, help=f"Local port for the credentials endpoint (default {DEFAULT_SERVE_PORT})")
+    parser.add_argument("--refresh-interval", type=float, default=DEFAULT_REFRESH_INTERVAL, help=f"Seconds between page refreshes that keep the session alive (default {DEFAULT_REFRESH_INTERVAL:.0f})")
+    args = parser.parse_args()
+
+    browsers = []
+    if args.accounts:
+        from orchestrator import load_accounts
+        for account in load_accounts(args.accounts):
+            if not account.get("debug_port") or not account.get("term_name"):
+                print(f"Skipping {account['name']}: debug_port and term_name are required")
+                continue
+            browsers.append(PrimedBrowser(
+                account["name"], account["term_name"], account["debug_port"],
+                user_data_dir=account.get("user_data_dir", ""), profile_directory=account.get("profile_directory", ""),
+                email=account.get("email", ""), edge_driver=account.get("edge_driver", args.edge_driver or ""),
+                output=account.get("output") or args.output, head=args.head))
+    elif args.term:
+        browsers.append(PrimedBrowser(
+            "default", args.term, args.debug_port, user_data_dir=args.user_data_dir or "",
+            profile_directory=args.profile_directory or "", email=args.email or "",
+            edge_driver=args.edge_driver or "", output=args.output, head=args.head))
+    else:
+        print("Provide --term (single profile) or --accounts.")
+        sys.exit(1)
+
+    # Resolve every account's profile from the email index in one pass per user data dir
+    pending = {}
+    for browser in browsers:
+        if browser.email and not browser.profile_directory:
+            browser.user_data_dir = browser.user_data_dir or fsc.get_edge_user_data_dir()
+            pending.setdefault(browser.user_data_dir, []).append(browser)
+    for user_data_dir, group in pending.items():
+        found = fsc.find_profile_directories(user_data_dir, [b.email for b in group])
+        for browser in group:
+            browser.profile_directory = found.get(browser.email) or "Default"
+
+    started = []
+    for browser in browsers:
+        try:
+            browser.start()
+            started.append(browser)
+        except Exception as e:
+            print(f"[{browser.name}] Failed to start: {e}")
+            browser.close()
+    if not started:
+        sys.exit(1)
+
+    stop = threading.Event()
+    refresher = threading.Thread(target=refresh_loop, args=(started, args.refresh_interval, stop), daemon=True)
+    refresher.start()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.serve_port), make_handler({b.name: b for b in started}))
+    print(f"Browser pool ready: http://127.0.0.1:{args.serve_port}/credentials/<name> ({', '.join(b.name for b in started)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down browser pool...")
+    finally:
+        stop.set()
+        server.server_close()
+        for browser in started:
+            browser.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import threading
+import tempfile
+from contextlib import contextmanager
+import requests
+
+# Written by fetch_srs_config.py / browser_pool.py, read by test_registration.py
+STORE_PATH = "credentials.json"
+STORE_VERSION = 1
+DEFAULT_PROFILE = "default"
+
+# Legacy plain-text format, still read when no store exists yet
+CONFIG_DUMP_PATH = "config_dump.txt"
+
+# Keys in config_dump.txt; each "KEY=" line is followed by its value on the next line
+DUMP_KEYS = ['COOKIE', 'TOKEN', 'SESSION_ID', 'EXTRACTED_AT', 'TERM']
+
+# Set SRS_BASE_URL to point the bot at another server (e.g. mock_srs_server.py)
+SRS_BASE_URL = os.environ.get("SRS_BASE_URL", "https://srs-owlexpress.kennesaw.edu/StudentRegistrationSsb/ssb")
+
+# Cheap authenticated GET: returns JSON while the session is live, a login redirect otherwise
+PROBE_PATH = "/classRegistration/getRegistrationEvents?termFilter="
+
+DEFAULT_MAX_AGE = 900.0
+
+# Serializes read-modify-write of the store within this process (the lock file covers other processes)
+_STORE_LOCK = threading.Lock()
+
+# path -> (mtime_ns, size, parsed store), so repeated reloads of an unchanged store skip JSON parsing
+_STORE_CACHE = {}
+
+def read_config_dump(path: str = CONFIG_DUMP_PATH) -> dict:
+    """Parses a legacy config_dump.txt into a dict. Raises FileNotFoundError if it doesn't exist."""
+    config = {}
+    with open(path, 'r') as f:
+        content = f.read()
+
+    # Parse simple key=value format from dump
+    # The dump format implies keys are followed by values on newlines
+    lines = content.split('\n')
+    current_key = None
+    for line in lines:
+        if line.strip() in [f"{key}=" for key in DUMP_KEYS]:
+            current_key = line.strip().replace('=', '')
+        elif current_key and line.strip():
+            config[current_key] = line.strip()
+            current_key = None # Reset after reading value
+
+    return config
+
+@contextmanager
+def _locked(path: str):
+    """Holds an exclusive lock on <path>.lock for a read-modify-write of the store."""
+    with _STORE_LOCK:
+        with open(f"{path}.lock", "a+") as lock_file:
+            if sys.platform == "win32":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if sys.platform == "win32":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def read_store(path: str = STORE_PATH) -> dict:
+    """Returns the whole store ({"version", "profiles": {name: credentials}}).
+       Missing or unreadable stores come back empty. Readers never need the lock:
+       writers replace the file atomically, so a reader sees either the old or the new store.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {"version": STORE_VERSION, "profiles": {}}
+    cached = _STORE_CACHE.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            store = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: could not read {path} ({e})")
+        return {"version": STORE_VERSION, "profiles": {}}
+    if not isinstance(store, dict) or not isinstance(store.get("profiles"), dict):
+        return {"version": STORE_VERSION, "profiles": {}}
+    _STORE_CACHE[path] = (stat.st_mtime_ns, stat.st_size, store)
+    return store
+
+def _write_store(store: dict, path: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".credentials-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(store, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def save_credentials(cookie: str, token: str, session_id: str, term: str = "",
+                     profile: str = DEFAULT_PROFILE, path: str = STORE_PATH, **metadata) -> dict:
+    """Stores one profile's credentials with when (and for which term) they were extracted.
+       Extra keyword arguments (email, profile_directory, source, ...) are kept as metadata.
+       Other profiles in the store are left untouched. Returns the saved entry.
+    """
+    entry = {
+        'COOKIE': cookie or "",
+        'TOKEN': token or "",
+        'SESSION_ID': session_id or "",
+        'EXTRACTED_AT': round(time.time(), 3),
+        'TERM': term,
+        'PROFILE': profile,
+        **{key.upper(): value for key, value in metadata.items() if value is not None},
+    }
+    with _locked(path):
+        _STORE_CACHE.pop(path, None)
+        store = read_store(path)
+        store = {"version": STORE_VERSION, "profiles": dict(store.get("profiles", {}))}
+        store["profiles"][profile] = entry
+        _write_store(store, path)
+    return entry
+
+def load_credentials(profile: str = DEFAULT_PROFILE, path: str = STORE_PATH,
+                     legacy_path: str | None = None) -> dict:
+    """Returns one profile's credentials from the store, falling back to a legacy
+       config_dump.txt (by default the one next to the store). Raises FileNotFoundError
+       if neither has them.
+    """
+    entry = read_store(path)["profiles"].get(profile)
+    if entry:
+        return dict(entry)
+    if legacy_path is None:
+        legacy_path = os.path.join(os.path.dirname(path), CONFIG_DUMP_PATH)
+    if os.path.exists(legacy_path):
+        return read_config_dump(legacy_path)
+    raise FileNotFoundError(f"no credentials for profile '{profile}' in {path}")
+
+def credentials_age(config: dict) -> float | None:
+    """Seconds since the credentials were extracted, or None if there is no timestamp."""
+    try:
+        return time.time() - float(config['EXTRACTED_AT'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def probe_credentials(config: dict, base_url: str = SRS_BASE_URL, timeout: float = 5) -> bool:
+    """Checks the cookie and synchronizer token with one authenticated request.
+       Expired sessions get redirected to the login page (or return HTML) instead of JSON.
+    """
+    headers = {
+        'Cookie': config.get('COOKIE', ''),
+        'X-Synchronizer-Token': config.get('TOKEN', ''),
+        'X-Requested-With': 'XMLHttpRequest',
+    }
+    try:
+        response = requests.get(f"{base_url}{PROBE_PATH}", headers=headers,
+                                allow_redirects=False, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        print(f"Credential probe failed: {e}")
+        return False
+    if response.status_code != 200:
+        return False
+    try:
+        response.json()
+    except json.JSONDecodeError:
+        return False
+    return True
+
+def load_valid_credentials(term: str = "", max_age: float = DEFAULT_MAX_AGE,
+                           path: str = STORE_PATH, base_url: str = SRS_BASE_URL,
+                           profile: str = DEFAULT_PROFILE) -> dict | None:
+    """Returns the stored credentials if they are recent, for the same term, and still accepted
+       by the server. Returns None when a fresh browser extraction is needed.
+    """
+    try:
+        config = load_credentials(profile, path)
+    except FileNotFoundError:
+        return None
+
+    if not all(config.get(key) and config[key] != "None" for key in ('COOKIE', 'TOKEN', 'SESSION_ID')):
+        return None
+    age = credentials_age(config)
+    if age is None or age > max_age:
+        return None
+    if term and config.get('TERM') != term:
+        return None
+    if not probe_credentials(config, base_url=base_url):
+        return None
+    return config
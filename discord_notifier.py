@@ -0,0 +1,174 @@
+import time
+import queue
+import atexit
+import threading
+import requests
+
+# Discord rejects message content longer than this
+MAX_MESSAGE_LEN = 2000
+
+# How long the sender waits for more messages to merge into the same post
+DEFAULT_COALESCE_DELAY = 0.25
+
+# Upper bound on how long exit waits for queued messages
+DEFAULT_FLUSH_TIMEOUT = 5.0
+
+MAX_ATTEMPTS = 5
+
+def chunk_lines(text: str, max_len: int) -> list[str]:
+    """Splits text into chunks of at most max_len characters, breaking on line
+       boundaries. Lines longer than max_len are split on their own. Blank lines are
+       kept, except one that falls exactly on a chunk boundary.
+    """
+    chunks = []
+    current = None  # None = nothing collected yet; "" is a blank line
+    for line in text.split("\n"):
+        while len(line) > max_len:
+            if current is not None:
+                chunks.append(current)
+                current = None
+            chunks.append(line[:max_len])
+            line = line[max_len:]
+        candidate = line if current is None else f"{current}\n{line}"
+        if len(candidate) > max_len:
+            chunks.append(current)
+            # A blank separator line would only open the next chunk with a newline
+            current = line if line else None
+        else:
+            current = candidate
+    if current is not None:
+        chunks.append(current)
+    # Discord rejects messages with no visible content
+    return [chunk for chunk in chunks if chunk.strip()]
+
+class DiscordNotifier:
+    """Posts to a Discord webhook from a background thread.
+       send() only enqueues, so a slow or rate-limited webhook never blocks the caller.
+    """
+
+    def __init__(self, webhook_url: str, user_id: str = "",
+                 coalesce_delay: float = DEFAULT_COALESCE_DELAY, timeout: float = 10):
+        self.webhook_url = webhook_url
+        self.user_id = user_id
+        self.coalesce_delay = coalesce_delay
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.session = requests.Session()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.webhook_url) and "YOUR_DISCORD_WEBHOOK_URL" not in self.webhook_url
+
+    def send(self, text: str, ping_user: bool = False, code_block: bool = False):
+        """Queues a message. code_block wraps it in ``` fences; ping_user mentions the user after it."""
+        if not self.enabled or not text:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+                self.thread.start()
+        self.queue.put((text, ping_user, code_block))
+
+    def flush(self, timeout: float = DEFAULT_FLUSH_TIMEOUT) -> bool:
+        """Waits up to timeout seconds for queued messages to be posted. Returns True if all were."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _drain(self, first) -> list:
+        """Collects everything queued within the coalesce window after the first item."""
+        items = [first]
+        deadline = time.monotonic() + self.coalesce_delay
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                items.append(self.queue.get(timeout=max(0.0, remaining)) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _format(self, items: list) -> list[str]:
+        """Merges consecutive items of the same kind and splits them into Discord-sized posts."""
+        runs = []
+        for text, ping, code_block in items:
+            if runs and runs[-1][2] == code_block and not runs[-1][1]:
+                runs[-1] = (f"{runs[-1][0]}\n{text}", ping, code_block)
+            else:
+                runs.append((text, ping, code_block))
+
+        posts = []
+        for text, ping, code_block in runs:
+            ping_suffix = f"\n<@{self.user_id}>" if ping and self.user_id else ""
+            reserve = len(ping_suffix) + (8 if code_block else 0)
+            chunks = chunk_lines(text, max(1, MAX_MESSAGE_LEN - reserve))
+            for i, chunk in enumerate(chunks):
+                content = f"```\n{chunk}\n```" if code_block else chunk
+                # Only ping on the final chunk
+                if i == len(chunks) - 1:
+                    content += ping_suffix
+                posts.append(content)
+        return posts
+
+    def _post(self, content: str):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.session.post(self.webhook_url, json={"content": content}, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                print(f"Failed to send Discord message: {e}")
+                time.sleep(min(2 ** attempt, 10))
+                continue
+            if response.status_code == 429:
+                # Discord reports how long to wait in the body (seconds) and Retry-After
+                try:
+                    retry_after = float(response.json().get("retry_after", 1))
+                except (ValueError, AttributeError):
+                    retry_after = float(response.headers.get("Retry-After", 1))
+                time.sleep(max(0.0, retry_after))
+                continue
+            if response.status_code >= 500:
+                time.sleep(min(2 ** attempt, 10))
+                continue
+            if not response.ok:
+                print(f"Discord webhook rejected message: HTTP {response.status_code}")
+            return
+        print("Failed to send Discord message: giving up after retries")
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            items = self._drain(first)
+            try:
+                for content in self._format(items):
+                    self._post(content)
+            except Exception as e:
+                print(f"Failed to log to Discord: {e}")
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+# One notifier (thread + connection) per webhook URL for the whole process
+_NOTIFIERS = {}
+_NOTIFIERS_LOCK = threading.Lock()
+
+def get_notifier(webhook_url: str, user_id: str = "") -> DiscordNotifier:
+    with _NOTIFIERS_LOCK:
+        notifier = _NOTIFIERS.get(webhook_url)
+        if notifier is None:
+            notifier = DiscordNotifier(webhook_url, user_id)
+            _NOTIFIERS[webhook_url] = notifier
+        notifier.user_id = user_id
+        return notifier
+
+def flush_all(timeout: float = DEFAULT_FLUSH_TIMEOUT) -> bool:
+    """Flushes every notifier, sharing one overall timeout."""
+    deadline = time.monotonic() + timeout
+    ok = True
+    for notifier in list(_NOTIFIERS.values()):
+        ok = notifier.flush(max(0.0, deadline - time.monotonic())) and ok
+    return ok
+
+atexit.register(flush_all)
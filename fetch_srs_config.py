@@ -1,19 +1,31 @@
+import re
 import time
 import json
 import os
+import sys
+import random
+import string
 import platform
+import shutil
 import argparse
+import tempfile
 import threading
 import subprocess
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs, urljoin
 import requests
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
+import credentials
+import discord_notifier
+import metrics
+
+# Selenium is imported on first use (load_selenium) so cached-credential runs never pay for it
+webdriver = None
+EdgeService = None
+EdgeOptions = None
+By = None
+WebDriverWait = None
+EC = None
+Keys = None
 
 # Discord webhook (configured via CLI args)
 DISCORD_WEBHOOK_URL = ""
@@ -25,6 +37,36 @@ LOG_BUFFER = []
 # Global driver reference for cleanup
 _driver = None
 
+# (step name, seconds) for each timed step of the current fetch
+STEP_TIMINGS = []
+
+# fetch_config force-exits when a run takes longer than this
+WATCHDOG_SECONDS = 30.0
+
+# Resolved msedgedriver path, keyed by the installed Edge version
+DRIVER_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "driver_cache.json")
+# Without a detectable Edge version the cached driver is trusted for this long
+DRIVER_CACHE_MAX_AGE = 24 * 3600
+
+# Edge profile directory -> account emails, re-read only when a profile's files change
+PROFILE_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile_index.json")
+
+def load_selenium():
+    """Imports selenium into this module's globals the first time a browser is needed."""
+    global webdriver, EdgeService, EdgeOptions, By, WebDriverWait, EC, Keys
+    if webdriver is not None:
+        return
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.edge.options import Options
+    from selenium.webdriver.common.by import By as _By
+    from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+    from selenium.webdriver.support import expected_conditions
+    from selenium.webdriver.common.keys import Keys as _Keys
+    EdgeService, EdgeOptions, By = Service, Options, _By
+    WebDriverWait, EC, Keys = _WebDriverWait, expected_conditions, _Keys
+    webdriver = _webdriver
+
 def _get_bot_config_path() -> str:
     script_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(script_dir, "bot_config.json")
@@ -51,29 +93,38 @@ def _cfg_get(cfg: dict, *keys: str, default: str = "") -> str:
             return value.strip()
     return default
 
-def cleanup_edge_processes():
-    """Kill any lingering Edge and msedgedriver processes spawned by this script."""
+def cleanup_edge_processes(pid: int | None = None):
+    """Kill the lingering msedgedriver process spawned by this script (and its children).
+       Without a pid nothing is killed: other msedgedriver processes may belong to parallel
+       runs for other accounts.
+    """
+    if not pid:
+        return
     try:
         if platform.system() == "Windows":
-            # Kill msedgedriver first, then edge processes we may have spawned
-            subprocess.run(["taskkill", "/F", "/IM", "msedgedriver.exe"], 
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
                          capture_output=True, timeout=5)
         else:
-            subprocess.run(["pkill", "-f", "msedgedriver"], 
-                         capture_output=True, timeout=5)
+            subprocess.run(["pkill", "-P", str(pid)], capture_output=True, timeout=5)
+            subprocess.run(["kill", "-9", str(pid)], capture_output=True, timeout=5)
     except Exception as e:
         print(f"Warning: Could not kill msedgedriver: {e}")
 
 def shutdown_driver():
     """Safely shut down the WebDriver and clean up processes."""
     global _driver
+    pid = None
     if _driver:
+        try:
+            pid = _driver.service.process.pid
+        except Exception:
+            pass
         try:
             _driver.quit()
         except:
             pass
         _driver = None
-    cleanup_edge_processes()
+    cleanup_edge_processes(pid)
 
 def log(message):
     """Accumulates logs in memory and prints to console."""
@@ -81,48 +132,50 @@ def log(message):
     LOG_BUFFER.append(message)
 
 def send_discord_buffer():
-    """Sends the accumulated logs as a single code block message."""
-    if not DISCORD_WEBHOOK_URL or "YOUR_DISCORD_WEBHOOK_URL" in DISCORD_WEBHOOK_URL:
-        return
-    
+    """Queues the accumulated logs as a single code block message and empties the buffer.
+       Posting happens on the notifier thread, so this never waits on Discord.
+    """
     if not LOG_BUFFER:
         return
+    notifier = discord_notifier.get_notifier(DISCORD_WEBHOOK_URL, DISCORD_USER_ID)
+    notifier.send("\n".join(LOG_BUFFER), code_block=True)
+    LOG_BUFFER.clear()
 
-    def _chunk_text(text: str, max_len: int) -> list[str]:
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = min(start + max_len, len(text))
-            chunks.append(text[start:end])
-            start = end
-        return chunks
-
-    full_log_text = "\n".join(LOG_BUFFER)
-    # Discord message limit is ~2000 chars; reserve for code block
-    max_body = max(1, 2000 - 6)
+def send_discord_message(message: str, ping_user: bool = False):
+    """Queues a single Discord message (outside the buffered log)."""
+    discord_notifier.get_notifier(DISCORD_WEBHOOK_URL, DISCORD_USER_ID).send(message, ping_user=ping_user)
 
+@contextmanager
+def timed_step(name: str):
+    """Times a block of the token fetch and prints how long it took."""
+    start = time.perf_counter()
     try:
-        chunks = _chunk_text(full_log_text, max_body)
-        for chunk in chunks:
-            content = f"```\n{chunk}\n```"
-            requests.post(DISCORD_WEBHOOK_URL, json={"content": content})
-    except Exception as e:
-        print(f"Failed to log to Discord: {e}")
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STEP_TIMINGS.append((name, elapsed))
+        metrics.observe_step(name, elapsed)
+        print(f"[TIMING] {name}: {elapsed:.2f}s")
 
+def wait_for_page_ready(driver, timeout: float = 15):
+    """Waits until the current document has finished loading."""
+    load_selenium()
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
 
-def send_discord_message(message: str, ping_user: bool = False):
-    """Send a single Discord message immediately (outside the buffered log)."""
-    if not DISCORD_WEBHOOK_URL or "YOUR_DISCORD_WEBHOOK_URL" in DISCORD_WEBHOOK_URL:
-        return
+def select2_results_ready(target_term: str):
+    """Condition: Select2 finished filtering and the highlighted result matches target_term."""
+    wanted = target_term.lower()
 
-    content = message
-    if ping_user and DISCORD_USER_ID:
-        content += f"\n<@{DISCORD_USER_ID}>"
-
-    try:
-        requests.post(DISCORD_WEBHOOK_URL, json={"content": content}, timeout=10)
-    except Exception as e:
-        print(f"Failed to send Discord message: {e}")
+    def _ready(driver):
+        if driver.find_elements(By.CSS_SELECTOR, ".select2-drop-active .select2-searching"):
+            return False
+        highlighted = driver.find_elements(By.CSS_SELECTOR, ".select2-drop-active .select2-highlighted")
+        if highlighted and wanted in highlighted[0].text.lower():
+            return highlighted[0]
+        return False
+    return _ready
 
 def get_edge_user_data_dir():
     home = os.path.expanduser("~")
@@ -137,117 +190,224 @@ def get_edge_user_data_dir():
         # Linux or others
         return os.path.join(home, ".config", "microsoft-edge")
 
-def find_profile_directory(user_data_dir, target_email):
-    print(f"Searching for profile with email: {target_email} in {user_data_dir}")
+def _read_json_field(text: str, key: str):
+    """Decodes just the value of the first "key": ... in a JSON document, without parsing the rest."""
+    marker = f'"{key}"'
+    start = text.find(marker)
+    while start != -1:
+        pos = start + len(marker)
+        while pos < len(text) and text[pos] in " \t\r\n":
+            pos += 1
+        if pos < len(text) and text[pos] == ":":
+            pos += 1
+            while pos < len(text) and text[pos] in " \t\r\n":
+                pos += 1
+            try:
+                return json.JSONDecoder().raw_decode(text, pos)[0]
+            except json.JSONDecodeError:
+                return None
+        start = text.find(marker, pos)
+    return None
+
+def _preferences_emails(pref_path: str) -> list[str]:
+    """Signed-in account emails from a profile's Preferences (account_info[].email)."""
+    try:
+        with open(pref_path, "r", encoding="utf-8") as f:
+            accounts = _read_json_field(f.read(), "account_info")
+    except (OSError, UnicodeDecodeError):
+        return []
+    if not isinstance(accounts, list):
+        return []
+    return [a["email"].lower() for a in accounts if isinstance(a, dict) and a.get("email")]
+
+def _local_state_emails(user_data_dir: str) -> dict[str, list[str]]:
+    """Profile directory -> email from Local State's profile.info_cache (one file for all profiles)."""
     try:
-        if not os.path.exists(user_data_dir):
-             print(f"User Data Directory not found: {user_data_dir}")
-             return "Default"
-
-        for item in os.listdir(user_data_dir):
-            if item == "Default" or item.startswith("Profile"):
-                pref_path = os.path.join(user_data_dir, item, "Preferences")
-                if os.path.exists(pref_path):
-                    try:
-                        with open(pref_path, 'r', encoding='utf-8') as f:
-                            data = f.read()
-                            if target_email in data:
-                                print(f"Found match in: {item}")
-                                return item
-                    except:
-                        pass
+        with open(os.path.join(user_data_dir, "Local State"), "r", encoding="utf-8") as f:
+            info_cache = _read_json_field(f.read(), "info_cache")
+    except (OSError, UnicodeDecodeError):
+        return {}
+    if not isinstance(info_cache, dict):
+        return {}
+    return {name: [info["user_name"].lower()] for name, info in info_cache.items()
+            if isinstance(info, dict) and info.get("user_name")}
+
+def _mtime(path: str) -> float | None:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def _load_profile_index() -> dict:
+    try:
+        with open(PROFILE_INDEX_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _write_json_atomic(data: dict, path: str):
+    """Writes JSON through a unique temp file in the same directory, so parallel fetches
+       never share a temp file and readers never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _save_profile_index(index: dict):
+    try:
+        _write_json_atomic(index, PROFILE_INDEX_PATH)
+    except OSError as e:
+        print(f"Warning: could not save profile index ({e})")
+
+def build_profile_index(user_data_dir: str) -> dict[str, list[str]]:
+    """Maps each profile directory to its account emails. Results are cached in
+       profile_index.json and a profile is only re-read when its Preferences mtime changes.
+    """
+    index = _load_profile_index()
+    cached = index.get(user_data_dir, {})
+    cached_profiles = cached.get("profiles", {})
+    changed = False
+
+    local_state_mtime = _mtime(os.path.join(user_data_dir, "Local State"))
+    if local_state_mtime != cached.get("local_state_mtime"):
+        local_state = _local_state_emails(user_data_dir)
+        changed = True
+    else:
+        local_state = cached.get("local_state", {})
+
+    profiles = {}
+    for item in os.listdir(user_data_dir):
+        if item != "Default" and not item.startswith("Profile"):
+            continue
+        pref_path = os.path.join(user_data_dir, item, "Preferences")
+        mtime = _mtime(pref_path)
+        if mtime is None:
+            continue
+        entry = cached_profiles.get(item)
+        if not entry or entry.get("mtime") != mtime:
+            entry = {"mtime": mtime, "emails": _preferences_emails(pref_path)}
+            changed = True
+        profiles[item] = entry
+    if set(profiles) != set(cached_profiles):
+        changed = True
+
+    if changed:
+        index[user_data_dir] = {"local_state_mtime": local_state_mtime, "local_state": local_state,
+                                "profiles": profiles}
+        _save_profile_index(index)
+
+    return {item: sorted(set(entry["emails"]) | set(local_state.get(item, [])))
+            for item, entry in profiles.items()}
+
+def find_profile_directories(user_data_dir: str, emails: list[str]) -> dict[str, str | None]:
+    """Looks up several emails with one index pass. Returns email -> profile directory (None if not found)."""
+    found = {email: None for email in emails}
+    if not os.path.exists(user_data_dir):
+        print(f"User Data Directory not found: {user_data_dir}")
+        return found
+    try:
+        index = build_profile_index(user_data_dir)
     except Exception as e:
         print(f"Error searching profiles: {e}")
-    
+        return found
+    # "Default" first, then Profile 1, Profile 2, ... so ties resolve the same way every time
+    ordered = sorted(index, key=lambda name: (name != "Default", len(name), name))
+    for email in emails:
+        wanted = email.strip().lower()
+        found[email] = next((name for name in ordered if wanted in index[name]), None)
+    return found
+
+def find_profile_directory(user_data_dir, target_email):
+    print(f"Searching for profile with email: {target_email} in {user_data_dir}")
+    match = find_profile_directories(user_data_dir, [target_email])[target_email]
+    if match:
+        print(f"Found match in: {match}")
+        return match
     print("Profile not found by email, defaulting to 'Default'")
     return "Default"
 
-def fetch_config():
-    global _driver
-    global DISCORD_WEBHOOK_URL
-    global DISCORD_USER_ID
-    
-    # Start a 55-second watchdog that will forcibly exit if we take too long
-    def watchdog_timeout():
-        print("\n[TIMEOUT] Script exceeded 30 seconds. Terminating...")
-        send_discord_message("[TIMEOUT] fetch_srs_config.py exceeded 30 seconds and is terminating.", ping_user=True)
-        shutdown_driver()  # Clean up Edge before exiting
-        os._exit(1)  # Force exit, bypassing finally blocks
-    
-    watchdog = threading.Timer(30.0, watchdog_timeout)
-    watchdog.daemon = True
-    watchdog.start()
-    
-    parser = argparse.ArgumentParser(description="SRS Config Fetcher")
-    parser.add_argument("--term", help="Term to select (e.g., 'Spring 2026')")
-    parser.add_argument("--debug-port", help="Port of existing Edge instance (e.g. 9222)")
-    parser.add_argument("--head", action="store_true", help="Launch browser in visible (non-headless) mode")
-    parser.add_argument("--edge-driver", help="Override Edge driver path (otherwise uses bot_config.json)")
-    parser.add_argument("--email", help="Override Edge profile email (otherwise uses bot_config.json)")
-    parser.add_argument("--webhook", help="Override Discord webhook URL (otherwise uses bot_config.json)")
-    parser.add_argument("--discord-user", help="Override Discord user ID (otherwise uses bot_config.json)")
-    args = parser.parse_args()
+def find_edge_binary() -> str | None:
+    """Best guess at the Microsoft Edge executable for this platform."""
+    system = platform.system()
+    if system == "Darwin":
+        candidates = ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"]
+    elif system == "Windows":
+        candidates = [
+            os.path.join(os.environ.get("PROGRAMFILES(X86)", r"C:\Program Files (x86)"), "Microsoft", "Edge", "Application", "msedge.exe"),
+            os.path.join(os.environ.get("PROGRAMFILES", r"C:\Program Files"), "Microsoft", "Edge", "Application", "msedge.exe"),
+        ]
+    else:
+        candidates = [shutil.which("microsoft-edge") or "", shutil.which("microsoft-edge-stable") or "",
+                      "/usr/bin/microsoft-edge"]
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
 
-    cfg = load_bot_config()
+def get_edge_version() -> str | None:
+    """Installed Edge version, read without starting a browser where the platform allows it."""
+    system = platform.system()
+    try:
+        if system == "Windows":
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Edge\BLBeacon") as key:
+                return winreg.QueryValueEx(key, "version")[0]
+        if system == "Darwin":
+            import plistlib
+            with open("/Applications/Microsoft Edge.app/Contents/Info.plist", "rb") as f:
+                return plistlib.load(f).get("CFBundleShortVersionString")
+        edge = find_edge_binary()
+        if edge:
+            out = subprocess.run([edge, "--version"], capture_output=True, text=True, timeout=5).stdout
+            return out.strip().split()[-1] if out.strip() else None
+    except Exception:
+        pass
+    return None
 
-    # Configure Discord logging from bot_config.json, with CLI overrides
-    DISCORD_WEBHOOK_URL = args.webhook or _cfg_get(cfg, "webhook_url", "webhook", default="")
-    DISCORD_USER_ID = args.discord_user or _cfg_get(cfg, "discord_user_id", "discord_user", default="")
+def _read_driver_cache() -> dict:
+    try:
+        with open(DRIVER_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
 
-    # Send a startup message immediately
-    send_discord_message("[START] fetch_srs_config.py starting.", ping_user=False)
-    
-    # If no term is provided via args, ask for it
-    target_term = args.term
-    if not target_term:
-        target_term = input("Enter Term to select (e.g. 'Spring 2026'): ").strip()
+def cached_driver_path(edge_version: str | None) -> str | None:
+    """The msedgedriver resolved for this Edge version on an earlier run, if it still exists."""
+    cache = _read_driver_cache()
+    path = cache.get("driver_path")
+    if not path or not os.path.exists(path):
+        return None
+    if edge_version:
+        return path if cache.get("edge_version") == edge_version else None
+    # Unknown Edge version: trust the cache for a while, then re-check
+    return path if time.time() - cache.get("resolved_at", 0) < DRIVER_CACHE_MAX_AGE else None
 
-    log("[Step 1] Fetching SRS Configuration...")
-    print("--- Fetching SRS Configuration ---")
-    
-    user_data_dir = get_edge_user_data_dir()
-    # Find the correct profile using --email, or fallback to Default
-    profile_email = args.email or _cfg_get(cfg, "email", default="")
-    profile_dir = find_profile_directory(user_data_dir, profile_email) if profile_email else "Default"
-    
-    options = EdgeOptions()
-    
-    if args.debug_port:
-        print(f"Connecting to existing Edge instance on port {args.debug_port}...")
-        options.add_experimental_option("debuggerAddress", f"127.0.0.1:{args.debug_port}")
-    else:
-        print("NOTE: Please ensure all Microsoft Edge windows are CLOSED before proceeding, or the driver may fail to launch with your profile.")
-        print("\n[TIP] To run this bot alongside your personal browsing (examples):")
-        print("1. Close ALL Microsoft Edge windows.")
-        print("2. Launch Edge with remote debugging enabled (examples):")
-        print("   macOS: '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge' --remote-debugging-port=9222 --user-data-dir='~/Library/Application Support/Microsoft Edge' --profile-directory='Default'")
-        print("   Windows: \"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe\" --remote-debugging-port=9222 --user-data-dir=\"%LOCALAPPDATA%\\Microsoft\\Edge\\User Data\" --profile-directory=\"Default\"")
-        print("   Linux: /usr/bin/microsoft-edge --remote-debugging-port=9222 --user-data-dir=\"$HOME/.config/microsoft-edge\" --profile-directory=\"Default\"")
-        if platform.system() == "Windows":
-            print("3. Run this bot again with: .\\run_bot.bat --debug-port 9222")
-            print("4. Then start the bot with: .\\run_bot.bat --term-name \"Spring Semester 2026\" --term-code 202601 --crn 11038")
-        else:
-            print("3. Run this bot again with: ./run_bot.sh --debug-port 9222")
-            print("4. Then start the bot with: ./run_bot.sh")
-        print("-" * 60 + "\n")
-        
-        # Default to headless unless user explicitly requested visible browser
-        if not args.head:
-            print('Launching browser in headless mode (no GUI). To see the browser, use the "--head" option.')
-            options.add_argument("--headless=new")
-        else:
-            print("Launching browser in visible (non-headless) mode as requested (--head).")
-        options.add_argument(f"user-data-dir={user_data_dir}")
-        options.add_argument(f"profile-directory={profile_dir}") 
-    
-    # Try to launch Edge 
-    
-    # Try to launch Edge
+def save_driver_cache(driver_path: str, edge_version: str | None):
+    try:
+        _write_json_atomic({"driver_path": driver_path, "edge_version": edge_version, "resolved_at": time.time()},
+                           DRIVER_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: could not save driver cache ({e})")
+
+def resolve_edge_service(edge_driver_path: str = ""):
+    """Returns an EdgeService for the given driver path, the cached driver for the installed
+       Edge version, an auto-downloaded driver, or PATH.
+    """
+    load_selenium()
     driver_path = None
     service = None
 
-    edge_driver_path = args.edge_driver or _cfg_get(cfg, "edge_driver", "edgeDriver", default="")
-
     # If user (or config) provided a driver path, try to use it first
     if edge_driver_path:
         if os.path.exists(edge_driver_path):
@@ -257,95 +417,112 @@ def fetch_config():
             print(f"Warning: Specified Edge driver not found: {edge_driver_path}. Falling back to auto-download or PATH.")
 
     if service is None:
-        try:
-            print("Attempting to download/update Edge Driver...")
-            driver_path = EdgeChromiumDriverManager().install()
-            service = EdgeService(driver_path)
-        except Exception as e:
-            print(f"Warning: Automated driver download failed ({e}).")
-            print("Attempting to use system-installed 'msedgedriver'...")
-            service = EdgeService() # Falls back to PATH
+        with timed_step("Resolve Edge driver"):
+            edge_version = get_edge_version()
+            driver_path = cached_driver_path(edge_version)
+            if driver_path:
+                print(f"Using cached Edge driver for Edge {edge_version or '(version unknown)'}: {driver_path}")
+                service = EdgeService(driver_path)
+            else:
+                try:
+                    print("Attempting to download/update Edge Driver...")
+                    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+                    driver_path = EdgeChromiumDriverManager().install()
+                    save_driver_cache(driver_path, edge_version)
+                    service = EdgeService(driver_path)
+                except Exception as e:
+                    print(f"Warning: Automated driver download failed ({e}).")
+                    print("Attempting to use system-installed 'msedgedriver'...")
+                    service = EdgeService() # Falls back to PATH
+    return service
 
-    try:
-        driver = webdriver.Edge(service=service, options=options)
-        _driver = driver  # Store globally for cleanup on timeout
-    except Exception as e:
-        print(f"\nCRITICAL ERROR launching Edge: {e}")
-        print("-" * 60)
-        print("TROUBLESHOOTING:")
-        print("1. Ensure Microsoft Edge is COMPLETELY closed (close all windows).")
-        print("2. If you got a 'driver not found' error above, try installing it manually:")
-        print("   macOS (brew): brew install --cask msedgedriver")
-        print("   Windows: download msedgedriver from https://developer.microsoft.com/en-us/microsoft-edge/tools/webdriver/")
-        print("   Or specify an existing driver with: --edge-driver \"C:\\path\\to\\msedgedriver.exe\"")
-        print("-" * 60)
-        send_discord_message(f"[FAIL] fetch_srs_config.py failed to launch Edge: {e}")
-        return
+def wait_for_workspace_page(driver, timeout: float = 20):
+    """Waits for the registration workspace's search panels (the session is primed once they show)."""
+    load_selenium()
+    print("Waiting for Registration Workspace...")
+    with timed_step("Registration Workspace"):
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".search-panel, #search-go"))
+        )
+    print("Workspace loaded! Session should be primed.")
 
-    try:
-        # 1. Navigate to Main Menu first (Login landing)
-        print("Navigating to Owl Express Main Menu...")
+def navigate_to_workspace(driver, target_term: str, interactive: bool = True, wait_for_workspace: bool = True):
+    """Walks from the Owl Express main menu to the primed registration workspace for target_term.
+       If the automated steps fail, asks for manual navigation (or re-raises when not interactive).
+       With wait_for_workspace=False it returns right after Continue is clicked (network capture
+       then waits for the workspace's first XHR instead of its DOM).
+    """
+    load_selenium()
+    # 1. Navigate to Main Menu first (Login landing)
+    print("Navigating to Owl Express Main Menu...")
+    with timed_step("Main Menu"):
         driver.get("https://owlexpress.kennesaw.edu/prodban/twbkwbis.P_GenMenu?name=bmenu.P_MainMnu")
-        
+
         # Allow time for manual login if needed
         print("Waiting for page load. If login is required, please log in manually in the browser window.")
         WebDriverWait(driver, 300).until(
              EC.url_contains("P_MainMnu")
         )
-        print("Main Menu detected.")
-        time.sleep(2)
+        wait_for_page_ready(driver)
+    print("Main Menu detected.")
 
-        # 2. Navigate to Registration Menu
-        print("Navigating to Registration Menu...")
+    # 2. Navigate to Registration Menu
+    print("Navigating to Registration Menu...")
+    with timed_step("Registration Menu"):
         driver.get("https://owlexpress.kennesaw.edu/prodban/twbkwbis.P_GenMenu?name=HTML_Registration_SubMenu")
         WebDriverWait(driver, 30).until(
              EC.url_contains("HTML_Registration_SubMenu")
         )
-        print("Registration Menu detected.")
-        time.sleep(2)
+        wait_for_page_ready(driver)
+    print("Registration Menu detected.")
 
-        # 3. Click "Register for Classes" / Navigate to SRS App
-        print("Navigating to Class Registration App...")
-        # Updated URL to match the HAR file activity
-        
-        # AUTOMATED NAVIGATION STEPS
-        try:
-             # A. Click "Register for Classes"
-             # Typically it is an anchor or div with text "Register for Classes"
-             # Banner 9 tiles often have IDs like 'registerLink' or class 'register'
-             # We try a few strategies
-             print("Attempting to click 'Register for Classes'...")
-             
+    # 3. Click "Register for Classes" / Navigate to SRS App
+    print("Navigating to Class Registration App...")
+    # Updated URL to match the HAR file activity
+
+    # AUTOMATED NAVIGATION STEPS
+    try:
+         # A. Click "Register for Classes"
+         # Typically it is an anchor or div with text "Register for Classes"
+         # Banner 9 tiles often have IDs like 'registerLink' or class 'register'
+         # We try a few strategies
+         print("Attempting to click 'Register for Classes'...")
+
+         with timed_step("Open Class Registration"):
              # Targeting the text specifically to avoid clicking "Prepare for Registration"
              register_link = WebDriverWait(driver, 15).until(
                  EC.element_to_be_clickable((By.XPATH, "//a[.//span[contains(text(), 'Register for Classes')] or contains(text(), 'Register for Classes')]"))
              )
-             
+
              # Handle potential new tab opening
              original_window = driver.current_window_handle
              windows_before = driver.window_handles
-             
+             url_before = driver.current_url
+
              register_link.click()
-             
-             # Wait for new window if one opened
-             time.sleep(2)
+
+             # Wait until either a new window opens or this tab navigates away
+             WebDriverWait(driver, 15).until(
+                 lambda d: len(d.window_handles) > len(windows_before) or d.current_url != url_before
+             )
              windows_after = driver.window_handles
              if len(windows_after) > len(windows_before):
                  print("New tab detected. Switching to new tab...")
                  new_window = [w for w in windows_after if w != original_window][0]
                  driver.switch_to.window(new_window)
-             
-             # B. Select Term
-             # The Select2 container ID is 's2id_txt_term' based on your snippet
-             print(f"Waiting for Term Selection page. Selecting: {target_term}")
-             
+
+         # B. Select Term
+         # The Select2 container ID is 's2id_txt_term' based on your snippet
+         print(f"Waiting for Term Selection page. Selecting: {target_term}")
+
+         with timed_step("Select Term"):
              # Locate the container and anchor
              container_id = "s2id_txt_term"
              print(f"Looking for element with ID: {container_id}")
              container = WebDriverWait(driver, 15).until(
                  EC.presence_of_element_located((By.ID, container_id))
              )
-             
+
              # Updated per Selenium IDE recording: Click the arrow specifically
              print("Opening dropdown via arrow click (.select2-arrow > b)...")
              try:
@@ -355,7 +532,6 @@ def fetch_config():
                  print(f"Standard click failed ({arrow_err}), trying JS...")
                  anchor = container.find_element(By.CSS_SELECTOR, "a.select2-choice")
                  driver.execute_script("arguments[0].click();", anchor)
-             time.sleep(1)
 
              # 2. Find the visible search input.
              # In Select2, when opened, the input inside 'select2-drop' becomes visible.
@@ -365,25 +541,30 @@ def fetch_config():
              )
              search_input.clear()
              search_input.send_keys(target_term)
-             time.sleep(2) # Wait for filtering
+             # Wait for filtering to finish and the matching term to be highlighted
+             try:
+                 WebDriverWait(driver, 10, poll_frequency=0.1).until(select2_results_ready(target_term))
+             except Exception:
+                 print("Term results did not match the requested term in time; selecting the highlighted result.")
              search_input.send_keys(Keys.ENTER)
-             
-             # C. Click Continue
-             print("Clicking Continue...")
+
+         # C. Click Continue
+         print("Clicking Continue...")
+         with timed_step("Continue"):
              try:
                  # Ensure button is present first
                  continue_btn = WebDriverWait(driver, 10).until(
                      EC.presence_of_element_located((By.ID, "term-go"))
                  )
-                 
-                 # Attempt standard click
+
+                 # Attempt standard click once the button is enabled
                  try:
                     WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.ID, "term-go"))).click()
                  except:
                     # Fallback to JS click if specific clickable check fails or click is intercepted
                     print("Standard click failed/timed out. forcing click via JS...")
                     driver.execute_script("arguments[0].click();", continue_btn)
-                    
+
              except Exception as btn_err:
                  print(f"Failed to find or click Continue button: {btn_err}")
                  # Last resort attempt by text
@@ -393,27 +574,30 @@ def fetch_config():
                      driver.execute_script("arguments[0].click();", btn_by_text)
                  except:
                      pass
-             
-             # Wait for search panels to appear (indicates session is fully initialized)
-             print("Waiting for Registration Workspace...")
-             WebDriverWait(driver, 20).until(
-                 EC.presence_of_element_located((By.CSS_SELECTOR, ".search-panel, #search-go"))
-             )
-             print("Workspace loaded! Session should be primed.")
 
-        except Exception as NavError:
-             print(f"WARNING: Automated navigation failed: {NavError}")
-             print("Please perform the navigation manually now.")
-             input("Press ENTER when ready...")
+         if not wait_for_workspace:
+             return
 
+         wait_for_workspace_page(driver)
 
-        # 4. Extract Headers/Tokens
-        
+    except Exception as NavError:
+         if not interactive:
+             raise
+         print(f"WARNING: Automated navigation failed: {NavError}")
+         print("Please perform the navigation manually now.")
+         input("Press ENTER when ready...")
+
+def extract_credentials(driver) -> dict:
+    """Reads the cookie string, synchronizer token and unique session ID from a primed session.
+       Returns {"cookie", "token", "session_id"}; missing values are None.
+    """
+    load_selenium()
+    with timed_step("Extract tokens"):
         # A. Cookies
         # Selenium get_cookies returns a list of dictionaries. We need to format the string "Name=Value; Name2=Value2"
         cookies = driver.get_cookies()
         cookie_string = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
-        
+
         # B. Synchronizer Token
         # Often stored in <meta name="synchronizerToken"> or in JS variable window.synchronizerToken
         sync_token = None
@@ -426,7 +610,7 @@ def fetch_config():
                 sync_token = driver.execute_script("return window.synchronizerToken || (window.checkCookie && window.checkCookie.token);")
             except:
                 pass
-        
+
         # C. Unique Session ID
         session_id = None
         print("Scanning Storage for Session ID...")
@@ -434,15 +618,405 @@ def fetch_config():
             # Simplified scan for the known key
             scan_script = "return sessionStorage.getItem('xe.unique.session.storage.id');"
             session_id = driver.execute_script(scan_script)
-            
+
             if session_id:
                  print(f"Found uniqueSessionId: {session_id}")
             else:
                  print("xe.unique.session.storage.id NOT found in sessionStorage.")
-                 
+
         except Exception as e:
             print(f"Error scanning storage: {e}")
 
+    return {"cookie": cookie_string, "token": sync_token, "session_id": session_id}
+
+# ==========================================
+# NETWORK CAPTURE (DevTools performance log)
+# ==========================================
+DEFAULT_CAPTURE_TIMEOUT = 8.0
+# Left on the watchdog for the page-read fallback when a capture comes up short
+CAPTURE_FALLBACK_RESERVE = 8.0
+
+# XHRs issued by this page only happen once the term is submitted and the session is primed
+WORKSPACE_PAGE = "classRegistration/classRegistration"
+
+def enable_network_capture(options):
+    """Asks msedgedriver to record DevTools Network events in the performance log."""
+    options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
+
+def _header(headers: dict, name: str) -> str | None:
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def _session_id_from(url: str, post_data: str) -> str | None:
+    """Finds uniqueSessionId in a request's query string or form/JSON body."""
+    values = parse_qs(urlparse(url).query).get("uniqueSessionId")
+    if values:
+        return values[0]
+    if not post_data:
+        return None
+    try:
+        data = json.loads(post_data)
+        return data.get("uniqueSessionId") if isinstance(data, dict) else None
+    except json.JSONDecodeError:
+        values = parse_qs(post_data).get("uniqueSessionId")
+        return values[0] if values else None
+
+def capture_credentials_from_network(driver, timeout: float = DEFAULT_CAPTURE_TIMEOUT) -> dict:
+    """Reads the cookie, X-Synchronizer-Token and uniqueSessionId off the registration workspace's
+       XHRs as they are sent, instead of querying the DOM after page load. Once the cookie and
+       token are in, uniqueSessionId is also taken from sessionStorage if no XHR carried it yet.
+       Requires enable_network_capture() on the driver's options. Returns as soon as all three
+       are seen, or what was found when timeout runs out or the log can't be read:
+       {"cookie", "token", "session_id"}.
+    """
+    found = {"cookie": None, "token": None, "session_id": None}
+    workspace_requests = set()
+    extra_headers = {}  # requestId -> headers as sent (the only place the Cookie header shows up)
+
+    def _take(headers: dict):
+        found["token"] = found["token"] or _header(headers, "X-Synchronizer-Token")
+        found["cookie"] = found["cookie"] or _header(headers, "Cookie")
+
+    def _session_id_from_storage():
+        # The workspace stores the ID before its first XHR; no need to wait for one that carries it
+        try:
+            return driver.execute_script("return sessionStorage.getItem('xe.unique.session.storage.id');")
+        except Exception:
+            return None
+
+    with timed_step("Capture tokens (network)"):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not all(found.values()):
+            try:
+                entries = driver.get_log("performance")
+            except Exception as e:
+                # e.g. a driver that doesn't expose the performance log type; the page is read instead
+                print(f"Could not read the performance log ({e.__class__.__name__}: {e}).")
+                log(f"Network capture failed, reading the page instead: {e}")
+                break
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, TypeError, json.JSONDecodeError):
+                    continue
+                method = message.get("method")
+                params = message.get("params", {})
+                request_id = params.get("requestId")
+                if method == "Network.requestWillBeSent":
+                    if params.get("type") != "XHR" or WORKSPACE_PAGE not in params.get("documentURL", ""):
+                        continue
+                    request = params.get("request", {})
+                    workspace_requests.add(request_id)
+                    _take(request.get("headers", {}))
+                    if request_id in extra_headers:
+                        _take(extra_headers.pop(request_id))
+                    found["session_id"] = found["session_id"] or _session_id_from(
+                        request.get("url", ""), request.get("postData", ""))
+                elif method == "Network.requestWillBeSentExtraInfo":
+                    # May arrive before or after its requestWillBeSent
+                    if request_id in workspace_requests:
+                        _take(params.get("headers", {}))
+                    else:
+                        extra_headers[request_id] = params.get("headers", {})
+            if found["cookie"] and found["token"] and not found["session_id"]:
+                found["session_id"] = _session_id_from_storage()
+            if not all(found.values()):
+                time.sleep(0.05)
+
+    missing = [key for key, value in found.items() if not value]
+    if missing:
+        print(f"Network capture did not find: {', '.join(missing)}")
+    else:
+        print(f"Captured credentials from the workspace's first XHRs (uniqueSessionId {found['session_id']}).")
+    return found
+
+# ==========================================
+# HTTP TERM SELECTION (browser only for login)
+# ==========================================
+TERM_SELECTION_PATH = "/term/termSelection?mode=registration"
+WORKSPACE_PATH = "/classRegistration/classRegistration"
+SYNC_TOKEN_RE = re.compile(r'<meta\s+name="synchronizerToken"\s+content="([^"]+)"', re.IGNORECASE)
+HTTP_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36"
+
+def open_srs_session(driver, base_url: str = credentials.SRS_BASE_URL) -> str:
+    """Opens the SRS term selection page (logging in through SSO if needed) and returns the
+       browser's cookies for the SRS host as a Cookie header string. No term is selected.
+    """
+    load_selenium()
+    print("Opening SRS term selection to pick up authenticated cookies...")
+    with timed_step("SRS login"):
+        driver.get(f"{base_url}{TERM_SELECTION_PATH}")
+        print("If login is required, please log in manually in the browser window.")
+        # The SSO login URL carries the target path in its service= parameter, so match the
+        # host and path rather than the whole URL
+        srs_host = urlparse(base_url).netloc
+
+        def _on_term_selection(d):
+            current = urlparse(d.current_url)
+            return current.netloc == srs_host and "termSelection" in current.path
+
+        WebDriverWait(driver, 300).until(_on_term_selection)
+    return "; ".join(f"{c['name']}={c['value']}" for c in driver.get_cookies())
+
+def generate_unique_session_id() -> str:
+    """Same shape as the SRS page's own xe.unique.session.storage.id: 5 random characters + epoch ms."""
+    prefix = "".join(random.choices(string.ascii_lowercase + string.digits, k=5))
+    return f"{prefix}{int(time.time() * 1000)}"
+
+def find_term_code(session: requests.Session, base_url: str, target_term: str, timeout: float = 15) -> str | None:
+    """Looks the term name up in getTerms. A numeric target_term is taken as the code itself."""
+    if target_term.strip().isdigit():
+        return target_term.strip()
+    response = session.get(f"{base_url}/classRegistration/getTerms",
+                           params={"searchTerm": target_term, "offset": 1, "max": 10, "_": int(time.time() * 1000)},
+                           timeout=timeout)
+    response.raise_for_status()
+    wanted = target_term.lower()
+    for term in response.json():
+        if wanted in term.get("description", "").lower():
+            return term.get("code")
+    return None
+
+def prime_term_over_http(cookie_string: str, target_term: str, base_url: str = credentials.SRS_BASE_URL,
+                         timeout: float = 15) -> dict:
+    """Does the term selection the Select2 page would do, as plain requests with the browser's cookies:
+       read the synchronizer token, resolve the term code, POST term/search with a new uniqueSessionId,
+       then load the registration workspace. Returns {"cookie", "token", "session_id"}.
+       Raises RuntimeError if the cookies aren't logged in or the term can't be selected.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": HTTP_USER_AGENT})
+    for pair in cookie_string.split(";"):
+        name, _, value = pair.strip().partition("=")
+        if name:
+            session.cookies.set(name, value)
+
+    with timed_step("Select term (HTTP)"):
+        page = session.get(f"{base_url}{TERM_SELECTION_PATH}", timeout=timeout)
+        match = SYNC_TOKEN_RE.search(page.text)
+        if not page.ok or not match:
+            raise RuntimeError(f"term selection page had no synchronizer token (HTTP {page.status_code}, {page.url}); not logged in?")
+        token = match.group(1)
+        session.headers.update({"X-Synchronizer-Token": token, "X-Requested-With": "XMLHttpRequest"})
+
+        term_code = find_term_code(session, base_url, target_term, timeout=timeout)
+        if not term_code:
+            raise RuntimeError(f"term '{target_term}' not found in getTerms")
+
+        session_id = generate_unique_session_id()
+        response = session.post(f"{base_url}/term/search", params={"mode": "registration"}, timeout=timeout, data={
+            "term": term_code, "studyPath": "", "studyPathText": "",
+            "startDatepicker": "", "endDatepicker": "", "uniqueSessionId": session_id,
+        })
+        response.raise_for_status()
+        try:
+            result = response.json()
+        except json.JSONDecodeError:
+            raise RuntimeError(f"term/search did not return JSON (HTTP {response.status_code})")
+        if not result.get("fwdURL"):
+            failures = result.get("studentEligFailures") or result.get("errors") or result
+            raise RuntimeError(f"term {term_code} was not accepted: {failures}")
+
+        # Loading the workspace finishes priming; it may also hand out a new token
+        workspace = session.get(urljoin(response.url, result["fwdURL"]), timeout=timeout)
+        match = SYNC_TOKEN_RE.search(workspace.text)
+        if match:
+            token = match.group(1)
+
+    print(f"Term {term_code} selected over HTTP (uniqueSessionId {session_id}).")
+    cookie = "; ".join(f"{c.name}={c.value}" for c in session.cookies)
+    return {"cookie": cookie, "token": token, "session_id": session_id}
+
+def extract_from_debug_port(debug_port, target_term: str = "", edge_driver_path: str = "") -> dict:
+    """Attaches to an Edge started with --remote-debugging-port, reloads the page and reads fresh
+       credentials, re-priming the workspace for target_term if it was lost. The browser is left open.
+       Returns {"cookie", "token", "session_id"} like extract_credentials.
+    """
+    load_selenium()
+    options = EdgeOptions()
+    options.add_experimental_option("debuggerAddress", f"127.0.0.1:{debug_port}")
+    driver = webdriver.Edge(service=resolve_edge_service(edge_driver_path), options=options)
+    try:
+        driver.refresh()
+        wait_for_page_ready(driver, timeout=30)
+        if target_term and not driver.find_elements(By.CSS_SELECTOR, ".search-panel, #search-go"):
+            navigate_to_workspace(driver, target_term, interactive=False)
+        return extract_credentials(driver)
+    finally:
+        try:
+            # Only detach; quitting would close the user's browser
+            driver.service.stop()
+        except Exception:
+            pass
+
+def fetch_config(argv: list[str] | None = None, background_cleanup: bool = False) -> dict | None:
+    """Runs the token fetch with the given CLI arguments (sys.argv when None).
+       Returns the credentials (COOKIE, TOKEN, SESSION_ID, ... keys) or None if extraction failed.
+       With background_cleanup, Edge is shut down on a separate thread so the caller
+       can start registering immediately.
+    """
+    global _driver
+    global DISCORD_WEBHOOK_URL
+    global DISCORD_USER_ID
+    fetch_start = time.perf_counter()
+    
+    # Start a 55-second watchdog that will forcibly exit if we take too long
+    def watchdog_timeout():
+        print(f"\n[TIMEOUT] Script exceeded {WATCHDOG_SECONDS:.0f} seconds. Terminating...")
+        send_discord_message(f"[TIMEOUT] fetch_srs_config.py exceeded {WATCHDOG_SECONDS:.0f} seconds and is terminating.", ping_user=True)
+        shutdown_driver()  # Clean up Edge before exiting
+        discord_notifier.flush_all(timeout=3)  # os._exit skips the atexit flush
+        os._exit(1)  # Force exit, bypassing finally blocks
+    
+    watchdog = threading.Timer(WATCHDOG_SECONDS, watchdog_timeout)
+    watchdog_deadline = time.monotonic() + WATCHDOG_SECONDS
+    watchdog.daemon = True
+    watchdog.start()
+    
+    parser = argparse.ArgumentParser(description="SRS Config Fetcher")
+    parser.add_argument("--term", help="Term to select (e.g., 'Spring 2026')")
+    parser.add_argument("--debug-port", help="Port of existing Edge instance (e.g. 9222)")
+    parser.add_argument("--head", action="store_true", help="Launch browser in visible (non-headless) mode")
+    parser.add_argument("--edge-driver", help="Override Edge driver path (otherwise uses bot_config.json)")
+    parser.add_argument("--email", help="Override Edge profile email (otherwise uses bot_config.json)")
+    parser.add_argument("--user-data-dir", help="Edge user data directory to launch with (otherwise the platform default)")
+    parser.add_argument("--profile-directory", help="Edge profile directory name (otherwise looked up by --email)")
+    parser.add_argument("--output", default=credentials.STORE_PATH, help=f"Credential store to write (default {credentials.STORE_PATH})")
+    parser.add_argument("--credentials-profile", default=credentials.DEFAULT_PROFILE, help=f"Name to store these credentials under, for stores shared by several accounts (default {credentials.DEFAULT_PROFILE})")
+    parser.add_argument("--webhook", help="Override Discord webhook URL (otherwise uses bot_config.json; '' disables it)")
+    parser.add_argument("--discord-user", help="Override Discord user ID (otherwise uses bot_config.json; '' disables the ping)")
+    parser.add_argument("--max-cache-age", type=float, default=credentials.DEFAULT_MAX_AGE, help=f"Reuse stored credentials younger than this many seconds if the server still accepts them (default {credentials.DEFAULT_MAX_AGE:.0f})")
+    parser.add_argument("--http-term", action="store_true", help="Use the browser only to log in; select the term and prime the registration workspace with plain HTTP requests (skips the Select2 UI; not with --cdp-capture)")
+    parser.add_argument("--cdp-capture", action="store_true", help="Read the cookie, token and session ID from the workspace's first XHRs via the DevTools performance log instead of waiting for the page and querying the DOM")
+    parser.add_argument("--no-cache", action="store_true", help="Always launch the browser, even if cached credentials are still valid")
+    parser.add_argument("--metrics-jsonl", help="Append browser step timings (driver install, Edge launch, navigation, token extraction) to this JSON lines file")
+    parser.add_argument("--metrics-prom", help="Write browser step histograms to this Prometheus textfile (node_exporter textfile collector)")
+    args = parser.parse_args(argv)
+    if args.http_term and args.cdp_capture:
+        # --http-term never loads the workspace in the browser, so there are no XHRs to capture
+        parser.error("--http-term and --cdp-capture can't be combined")
+
+    cfg = load_bot_config()
+    metrics.enable(args.metrics_jsonl, args.metrics_prom, source="fetch")
+
+    # Configure Discord logging from bot_config.json, with CLI overrides
+    DISCORD_WEBHOOK_URL = args.webhook if args.webhook is not None else _cfg_get(cfg, "webhook_url", "webhook", default="")
+    DISCORD_USER_ID = args.discord_user if args.discord_user is not None else _cfg_get(cfg, "discord_user_id", "discord_user", default="")
+
+    # If no term is provided via args, ask for it
+    target_term = args.term
+    if not target_term:
+        target_term = input("Enter Term to select (e.g. 'Spring 2026'): ").strip()
+
+    # Skip the browser entirely if the last extraction is still live
+    if not args.no_cache:
+        cached = credentials.load_valid_credentials(term=target_term, max_age=args.max_cache_age, path=args.output,
+                                                    profile=args.credentials_profile)
+        if cached:
+            watchdog.cancel()
+            age = credentials.credentials_age(cached)
+            log(f"[Step 1] Reusing cached SRS credentials (extracted {age:.0f}s ago, still valid). Skipping browser.")
+            send_discord_buffer()
+            return cached
+
+    # Send a startup message immediately
+    send_discord_message("[START] fetch_srs_config.py starting.", ping_user=False)
+
+    log("[Step 1] Fetching SRS Configuration...")
+    print("--- Fetching SRS Configuration ---")
+    
+    user_data_dir = args.user_data_dir or get_edge_user_data_dir()
+    # Find the correct profile using --profile-directory or --email, or fallback to Default
+    profile_email = args.email or _cfg_get(cfg, "email", default="")
+    if args.profile_directory:
+        profile_dir = args.profile_directory
+    else:
+        profile_dir = find_profile_directory(user_data_dir, profile_email) if profile_email else "Default"
+    
+    load_selenium()
+    options = EdgeOptions()
+    if args.cdp_capture:
+        enable_network_capture(options)
+    
+    if args.debug_port:
+        print(f"Connecting to existing Edge instance on port {args.debug_port}...")
+        options.add_experimental_option("debuggerAddress", f"127.0.0.1:{args.debug_port}")
+    else:
+        print("NOTE: Please ensure all Microsoft Edge windows are CLOSED before proceeding, or the driver may fail to launch with your profile.")
+        print("\n[TIP] To run this bot alongside your personal browsing (examples):")
+        print("1. Close ALL Microsoft Edge windows.")
+        print("2. Launch Edge with remote debugging enabled (examples):")
+        print("   macOS: '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge' --remote-debugging-port=9222 --user-data-dir='~/Library/Application Support/Microsoft Edge' --profile-directory='Default'")
+        print("   Windows: \"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe\" --remote-debugging-port=9222 --user-data-dir=\"%LOCALAPPDATA%\\Microsoft\\Edge\\User Data\" --profile-directory=\"Default\"")
+        print("   Linux: /usr/bin/microsoft-edge --remote-debugging-port=9222 --user-data-dir=\"$HOME/.config/microsoft-edge\" --profile-directory=\"Default\"")
+        if platform.system() == "Windows":
+            print("3. Run this bot again with: .\\run_bot.bat --debug-port 9222")
+            print("4. Then start the bot with: .\\run_bot.bat --term-name \"Spring Semester 2026\" --term-code 202601 --crn 11038")
+        else:
+            print("3. Run this bot again with: ./run_bot.sh --debug-port 9222")
+            print("4. Then start the bot with: ./run_bot.sh")
+        print("-" * 60 + "\n")
+        
+        # Default to headless unless user explicitly requested visible browser
+        if not args.head:
+            print('Launching browser in headless mode (no GUI). To see the browser, use the "--head" option.')
+            options.add_argument("--headless=new")
+        else:
+            print("Launching browser in visible (non-headless) mode as requested (--head).")
+        options.add_argument(f"user-data-dir={user_data_dir}")
+        options.add_argument(f"profile-directory={profile_dir}") 
+    
+    # Try to launch Edge
+    edge_driver_path = args.edge_driver or _cfg_get(cfg, "edge_driver", "edgeDriver", default="")
+    service = resolve_edge_service(edge_driver_path)
+
+    try:
+        with timed_step("Launch Edge"):
+            driver = webdriver.Edge(service=service, options=options)
+        _driver = driver  # Store globally for cleanup on timeout
+    except Exception as e:
+        print(f"\nCRITICAL ERROR launching Edge: {e}")
+        print("-" * 60)
+        print("TROUBLESHOOTING:")
+        print("1. Ensure Microsoft Edge is COMPLETELY closed (close all windows).")
+        print("2. If you got a 'driver not found' error above, try installing it manually:")
+        print("   macOS (brew): brew install --cask msedgedriver")
+        print("   Windows: download msedgedriver from https://developer.microsoft.com/en-us/microsoft-edge/tools/webdriver/")
+        print("   Or specify an existing driver with: --edge-driver \"C:\\path\\to\\msedgedriver.exe\"")
+        print("-" * 60)
+        send_discord_message(f"[FAIL] fetch_srs_config.py failed to launch Edge: {e}")
+        return None
+
+    result = None
+    try:
+        if args.http_term:
+            # Browser only logs in; term selection and priming go over HTTP with its cookies
+            extracted = prime_term_over_http(open_srs_session(driver), target_term)
+        else:
+            navigate_to_workspace(driver, target_term, wait_for_workspace=not args.cdp_capture)
+
+
+            # 4. Extract Headers/Tokens
+
+            if args.cdp_capture:
+                # Login and navigation already used part of the watchdog; keep room for the fallback
+                remaining = watchdog_deadline - time.monotonic()
+                extracted = capture_credentials_from_network(
+                    driver, timeout=max(1.0, min(DEFAULT_CAPTURE_TIMEOUT, remaining - CAPTURE_FALLBACK_RESERVE)))
+                if not all(extracted.values()):
+                    print("Falling back to reading the page for the missing values...")
+                    # Navigation didn't wait for the workspace in capture mode
+                    wait_for_workspace_page(driver, timeout=max(1.0, watchdog_deadline - time.monotonic() - 2.0))
+                    from_page = extract_credentials(driver)
+                    extracted = {key: extracted[key] or from_page[key] for key in extracted}
+            else:
+                extracted = extract_credentials(driver)
+        cookie_string = extracted["cookie"]
+        sync_token = extracted["token"]
+        session_id = extracted["session_id"]
+
         print("\n" + "="*50)
         print("EXTRACTED CONFIGURATION")
         print("="*50)
@@ -454,12 +1028,17 @@ def fetch_config():
         print("\n" + "="*50)
         
         # Save to file for easy usage
-        with open("config_dump.txt", "w") as f:
-            f.write(f"COOKIE=\n{cookie_string}\n\n")
-            f.write(f"TOKEN=\n{sync_token}\n\n")
-            f.write(f"SESSION_ID=\n{session_id}\n")
-            
+        saved = credentials.save_credentials(cookie_string, sync_token, session_id, term=target_term,
+                                             profile=args.credentials_profile, path=args.output,
+                                             email=profile_email or None, profile_directory=profile_dir,
+                                             source="browser")
+        if cookie_string and sync_token and session_id:
+            result = saved
+
         log("Successfully extracted SRS configuration info.")
+        time_to_token = time.perf_counter() - fetch_start
+        metrics.observe_step("Time to token", time_to_token)
+        log(f"Time to token: {time_to_token:.2f}s")
         
         # Close automatically now that we are automated
         print("Closing browser...")
@@ -474,12 +1053,18 @@ def fetch_config():
         watchdog.cancel()
         # Clean up driver and processes
         if not args.debug_port:
-            shutdown_driver()
+            if background_cleanup:
+                threading.Thread(target=shutdown_driver, name="edge-cleanup").start()
+            else:
+                shutdown_driver()
         else:
             print("Detaching from existing browser session (window left open).")
 
+        metrics.write_prometheus()
         # Flush buffered logs at the end
         send_discord_buffer()
 
+    return result
+
 if __name__ == "__main__":
-    fetch_config()
+    sys.exit(0 if fetch_config() else 1)
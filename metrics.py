@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import socket
+import threading
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Histogram buckets in seconds, shared by HTTP phases and browser steps
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_PHASES = ("dns", "connect", "tls", "ttfb", "total")
+
+# Set by enable(); everything below is a no-op while it is None
+RECORDER = None
+
+# Phase timings of the request running on this thread (see start_request)
+_phases = threading.local()
+
+def _current() -> dict | None:
+    return getattr(_phases, "current", None)
+
+# ==========================================
+# CONNECTION CLASSES
+# ==========================================
+
+class _TimedConnectionMixin:
+    """Splits connection setup into DNS and TCP connect for the request on this thread."""
+
+    def _new_conn(self):
+        phases = _current()
+        if phases is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            resolved = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            resolved = None  # let urllib3 raise its own NameResolutionError below
+        resolved_at = time.perf_counter()
+        phases["dns"] = resolved_at - start
+        # Connect to the address we just resolved; TLS still uses self.host for SNI
+        dns_host = self._dns_host
+        if resolved:
+            self._dns_host = resolved
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        phases["connect"] = time.perf_counter() - resolved_at
+        return sock
+
+    def getresponse(self):
+        response = super().getresponse()
+        phases = _current()
+        if phases is not None and "ttfb" not in phases:
+            # Like curl's time_starttransfer: counted from the start of the request
+            phases["ttfb"] = time.perf_counter() - phases["start"]
+        return response
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        phases = _current()
+        start = time.perf_counter()
+        super().connect()
+        if phases is not None:
+            elapsed = time.perf_counter() - start
+            phases["tls"] = max(0.0, elapsed - phases.get("dns", 0.0) - phases.get("connect", 0.0))
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report DNS, connect, TLS and TTFB phases."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+# ==========================================
+# RECORDER
+# ==========================================
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+class MetricsRecorder:
+    """Collects timings, appends each event to a JSON lines file and keeps
+       per-label histograms for the Prometheus textfile.
+    """
+
+    def __init__(self, jsonl_path: str = "", prom_path: str = "", source: str = ""):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.source = source
+        self.http = {}        # (endpoint, phase) -> Histogram
+        self.statuses = {}    # (endpoint, status) -> count
+        self.steps = {}       # step -> Histogram
+        self.lock = threading.Lock()
+
+    def _write_event(self, event: dict):
+        if not self.jsonl_path:
+            return
+        event = {"ts": round(time.time(), 6), "source": self.source, **event}
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def observe_request(self, endpoint: str, phases: dict, status: str):
+        with self.lock:
+            for phase in HTTP_PHASES:
+                if phase in phases:
+                    self.http.setdefault((endpoint, phase), Histogram()).observe(phases[phase])
+            self.statuses[(endpoint, status)] = self.statuses.get((endpoint, status), 0) + 1
+            self._write_event({
+                "type": "http", "endpoint": endpoint, "status": status,
+                # Reused keep-alive connections have no dns/connect/tls phases
+                "reused": "connect" not in phases,
+                **{f"{p}_ms": round(phases[p] * 1000, 3) for p in HTTP_PHASES if p in phases},
+            })
+
+    def observe_step(self, name: str, seconds: float):
+        with self.lock:
+            self.steps.setdefault(name, Histogram()).observe(seconds)
+            self._write_event({"type": "step", "step": name, "seconds": round(seconds, 4)})
+
+    def write_prometheus(self, path: str = ""):
+        """Writes all histograms in the node_exporter textfile format (atomically)."""
+        path = path or self.prom_path
+        if not path:
+            return
+        lines = []
+        with self.lock:
+            if self.http:
+                lines.append("# HELP course_bot_http_phase_seconds SRS request time by endpoint and phase.")
+                lines.append("# TYPE course_bot_http_phase_seconds histogram")
+                for (endpoint, phase), hist in sorted(self.http.items()):
+                    lines += _histogram_lines("course_bot_http_phase_seconds",
+                                              f'source="{self.source}",endpoint="{endpoint}",phase="{phase}"', hist)
+            if self.statuses:
+                lines.append("# HELP course_bot_http_requests_total SRS requests by endpoint and outcome.")
+                lines.append("# TYPE course_bot_http_requests_total counter")
+                for (endpoint, status), count in sorted(self.statuses.items()):
+                    lines.append(f'course_bot_http_requests_total{{source="{self.source}",endpoint="{endpoint}",status="{status}"}} {count}')
+            if self.steps:
+                lines.append("# HELP course_bot_browser_step_seconds Token fetch time by browser step.")
+                lines.append("# TYPE course_bot_browser_step_seconds histogram")
+                for step, hist in sorted(self.steps.items()):
+                    lines += _histogram_lines("course_bot_browser_step_seconds",
+                                              f'source="{self.source}",step="{_escape(step)}"', hist)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def _histogram_lines(name: str, labels: str, hist: Histogram) -> list[str]:
+    lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in zip(BUCKETS, hist.counts)]
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.total}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {hist.total}")
+    return lines
+
+# ==========================================
+# MODULE API
+# ==========================================
+
+def enable(jsonl_path: str = "", prom_path: str = "", source: str = "") -> MetricsRecorder | None:
+    """Turns on recording if either output path is given."""
+    global RECORDER
+    if jsonl_path or prom_path:
+        RECORDER = MetricsRecorder(jsonl_path, prom_path, source)
+    return RECORDER
+
+def endpoint_name(url: str) -> str:
+    """'.../ssb/classRegistration/addCRNRegistrationItems' -> 'classRegistration/addCRNRegistrationItems'."""
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    return "/".join(parts[-2:]) if parts else "/"
+
+def start_request() -> dict | None:
+    """Starts collecting phases for the request about to run on this thread."""
+    if RECORDER is None:
+        return None
+    phases = {"start": time.perf_counter()}
+    _phases.current = phases
+    return phases
+
+def finish_request(url: str, phases: dict | None, status: str):
+    if phases is None:
+        return
+    _phases.current = None
+    phases["total"] = time.perf_counter() - phases["start"]
+    RECORDER.observe_request(endpoint_name(url), phases, status)
+
+def observe_step(name: str, seconds: float):
+    if RECORDER is not None:
+        RECORDER.observe_step(name, seconds)
+
+def write_prometheus():
+    if RECORDER is not None:
+        try:
+            RECORDER.write_prometheus()
+        except OSError as e:
+            print(f"Warning: could not write metrics textfile ({e})")
@@ -0,0 +1,355 @@
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Same path prefix as the real SRS, so only scheme/host/port change in BASE_URL
+SSB_PATH = "/StudentRegistrationSsb/ssb"
+# Where expired sessions are redirected, like the real SSO login
+LOGIN_PATH = "/cas/login"
+
+DEFAULT_PORT = 8790
+DEFAULT_SEATS = 5
+
+# Terms offered on the term selection page
+MOCK_TERMS = [
+    {"code": "202601", "description": "Spring Semester 2026"},
+    {"code": "202508", "description": "Fall Semester 2025"},
+]
+MOCK_SYNC_TOKEN = "mock-synchronizer-token"
+MOCK_SUBJECTS = ["BIOL", "CSE", "ENGL", "MATH"]
+
+def parse_latency(spec: str):
+    """Builds a latency sampler (returns seconds) from a spec in milliseconds:
+       'fixed:50', 'uniform:20:80', 'normal:50:10', 'lognormal:50:0.5' (median, sigma) or 'exp:50'.
+    """
+    kind, _, rest = spec.partition(":")
+    params = [float(p) for p in rest.split(":") if p]
+    kind = kind.lower()
+    if kind == "fixed":
+        return lambda: params[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(params[0], params[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(params[0], params[1])) / 1000
+    if kind == "lognormal":
+        mu = math.log(params[0])
+        return lambda: random.lognormvariate(mu, params[1]) / 1000
+    if kind == "exp":
+        return lambda: random.expovariate(1 / params[0]) / 1000
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+def parse_seats(spec: str) -> dict:
+    """Parses '11038=2,10961=0' into {'11038': 2, '10961': 0}."""
+    seats = {}
+    for part in spec.split(","):
+        if "=" in part:
+            crn, count = part.split("=", 1)
+            seats[crn.strip()] = int(count)
+    return seats
+
+class MockSRS:
+    """In-memory registration state shared by all request handlers."""
+
+    def __init__(self, seats: dict | None = None, default_seats: int = DEFAULT_SEATS,
+                 latency: str = "fixed:0", submit_latency: str = "", error_rate: float = 0.0,
+                 known_crns: set | None = None, contention: float = 0.0, session_ttl: float = 0.0,
+                 catalog_size: int = 0):
+        self.seats = dict(seats or {})
+        self.default_seats = default_seats
+        self.known_crns = known_crns
+        self.latency = parse_latency(latency)
+        self.submit_latency = parse_latency(submit_latency) if submit_latency else self.latency
+        self.error_rate = error_rate
+        # Competing students grabbing seats, per second across all CRNs
+        self.contention = contention
+        self.registered = {}  # cookie -> set of CRNs
+        # Seconds a cookie stays logged in after its first request (0 = forever)
+        self.session_ttl = session_ttl
+        self.sessions = {}  # cookie -> first seen
+        self.primed = {}  # cookie -> (term code, uniqueSessionId) from term/search
+        # CRNs listed by class search: the known/seeded ones plus catalog_size generated sections
+        self.catalog = sorted(set(known_crns or ()) | set(self.seats) | {str(10000 + i) for i in range(catalog_size)})
+        self.lock = threading.Lock()
+        self.stats = {"add": 0, "submit": 0, "enrollment": 0, "errors": 0, "expired": 0, "search": 0}
+
+    def session_valid(self, cookie: str) -> bool:
+        if not self.session_ttl:
+            return True
+        with self.lock:
+            first_seen = self.sessions.setdefault(cookie, time.monotonic())
+        return time.monotonic() - first_seen < self.session_ttl
+
+    def seats_for(self, crn: str) -> int:
+        if crn not in self.seats:
+            self.seats[crn] = self.default_seats
+        return self.seats[crn]
+
+    def crn_exists(self, crn: str) -> bool:
+        return crn.isdigit() and (self.known_crns is None or crn in self.known_crns)
+
+    def model_for(self, crn: str, term: str) -> dict:
+        return {
+            "courseReferenceNumber": crn,
+            "term": term,
+            "courseTitle": f"Mock Course {crn}",
+            "subject": self.subject_for(crn),
+            "courseNumber": crn[-4:],
+            "registrationActions": [
+                {"courseRegistrationStatus": "RW", "description": "Web Registered"},
+                {"courseRegistrationStatus": "DW", "description": "Web Drop"},
+            ],
+            "selectedAction": None,
+        }
+
+    def subject_for(self, crn: str) -> str:
+        return MOCK_SUBJECTS[int(crn) % len(MOCK_SUBJECTS)] if crn.isdigit() else "MOCK"
+
+    def search(self, term: str, subject: str, offset: int, page_size: int) -> dict:
+        """One page of class search results, shaped like searchResults/searchResults."""
+        crns = [crn for crn in self.catalog if not subject or self.subject_for(crn) == subject]
+        page = []
+        with self.lock:
+            for crn in crns[offset:offset + page_size]:
+                seats = self.seats_for(crn)
+                page.append({
+                    "courseReferenceNumber": crn, "term": term, "subject": self.subject_for(crn),
+                    "courseNumber": crn[-4:], "courseTitle": f"Mock Course {crn}",
+                    "maximumEnrollment": self.default_seats, "enrollment": max(0, self.default_seats - seats),
+                    "seatsAvailable": seats, "waitCapacity": 0, "waitCount": 0, "waitAvailable": 0,
+                    "openSection": seats > 0, "isSectionLinked": False, "linkIdentifier": None,
+                })
+        return {"success": True, "totalCount": len(crns), "data": page,
+                "pageOffset": offset, "pageMaxSize": page_size}
+
+    def add_items(self, crns: list[str], term: str) -> dict:
+        items = []
+        for crn in crns:
+            if not self.crn_exists(crn):
+                items.append({"success": False, "message": f"Invalid CRN {crn}", "model": None})
+            else:
+                items.append({"success": True, "message": None, "model": self.model_for(crn, term)})
+        return {"aaData": items}
+
+    def submit(self, cookie: str, models: list[dict]) -> dict:
+        updates = []
+        with self.lock:
+            held = self.registered.setdefault(cookie, set())
+            for model in models:
+                crn = str(model.get("courseReferenceNumber", ""))
+                item = {"courseReferenceNumber": crn, "courseTitle": model.get("courseTitle"),
+                        "crnErrors": [], "messages": []}
+                if not model.get("selectedAction"):
+                    item["crnErrors"].append({"message": "No registration action selected"})
+                elif crn in held:
+                    item["crnErrors"].append({"message": "Duplicate CRN"})
+                elif self.seats_for(crn) <= 0:
+                    item["crnErrors"].append({"message": "Closed Section"})
+                else:
+                    self.seats[crn] -= 1
+                    held.add(crn)
+                    item["messages"].append({"type": "success", "message": "Registered"})
+                item["statusDescription"] = "Errors Preventing Registration" if item["crnErrors"] else "Registered"
+                updates.append(item)
+        return {"success": True, "message": None, "data": {"update": updates}}
+
+    def registration_events(self, cookie: str, term: str) -> list[dict]:
+        """Schedule entries (one per held CRN) like getRegistrationEvents returns."""
+        with self.lock:
+            held = sorted(self.registered.get(cookie, ()))
+        return [{"crn": crn, "term": term, "subject": self.subject_for(crn), "courseNumber": crn[-4:],
+                 "title": f"Mock Course {crn}", "start": None, "end": None} for crn in held]
+
+    def enrollment_html(self, crn: str) -> str:
+        with self.lock:
+            seats = self.seats_for(crn)
+        return (f'<span class="status-bold">Enrollment Seats Available:</span> '
+                f'<span dir="ltr"> {max(0, seats)} </span><br/>')
+
+    def contention_loop(self, stop: threading.Event):
+        """Simulates other students taking seats at the configured rate."""
+        while not stop.wait(1.0 / self.contention):
+            with self.lock:
+                open_crns = [crn for crn, count in self.seats.items() if count > 0]
+                if open_crns:
+                    self.seats[random.choice(open_crns)] -= 1
+
+def make_handler(state: MockSRS):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; don't let Nagle delay the body
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: str, content_type: str = "application/json"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _endpoint(self) -> str:
+            path = urlparse(self.path).path
+            return path[len(SSB_PATH):] if path.startswith(SSB_PATH) else path
+
+        def _maybe_fail(self) -> bool:
+            if state.error_rate and random.random() < state.error_rate:
+                with state.lock:
+                    state.stats["errors"] += 1
+                self._send(503, "<html><body>Service Unavailable</body></html>", "text/html")
+                return True
+            return False
+
+        def _check_session(self) -> bool:
+            """Redirects to the login page once the cookie has expired."""
+            if state.session_valid(self.headers.get("Cookie", "")):
+                return True
+            with state.lock:
+                state.stats["expired"] += 1
+            self.send_response(302)
+            self.send_header("Location", LOGIN_PATH)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return False
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            endpoint = self._endpoint()
+            time.sleep(state.latency())
+            if self.path.startswith(LOGIN_PATH):
+                self._send(200, "<html><body>Log in</body></html>", "text/html")
+            elif endpoint == "/classRegistration/getRegistrationEvents":
+                if self._check_session():
+                    term = parse_qs(urlparse(self.path).query).get("termFilter", [""])[0]
+                    self._send(200, json.dumps(state.registration_events(self.headers.get("Cookie", ""), term)))
+            elif endpoint in ("/term/termSelection", "/classRegistration/classRegistration"):
+                if self._check_session():
+                    self._send(200, f'<html><head><meta name="synchronizerToken" content="{MOCK_SYNC_TOKEN}">'
+                                    f'</head><body></body></html>', "text/html")
+            elif endpoint == "/searchResults/searchResults":
+                if self._check_session():
+                    query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                    with state.lock:
+                        state.stats["search"] += 1
+                    self._send(200, json.dumps(state.search(query.get("txt_term", ""), query.get("txt_subject", ""),
+                                                            int(query.get("pageOffset", 0)),
+                                                            int(query.get("pageMaxSize", 10)))))
+            elif endpoint == "/classRegistration/getTerms":
+                if self._check_session():
+                    wanted = parse_qs(urlparse(self.path).query).get("searchTerm", [""])[0].lower()
+                    self._send(200, json.dumps([t for t in MOCK_TERMS if wanted in t["description"].lower()]))
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+
+        def do_POST(self):
+            endpoint = self._endpoint()
+            body = self._read_body()
+            if not self._check_session():
+                return
+            if endpoint == "/classRegistration/addCRNRegistrationItems":
+                time.sleep(state.latency())
+                if self._maybe_fail():
+                    return
+                form = parse_qs(body.decode("utf-8"))
+                crns = [c.strip() for c in form.get("crnList", [""])[0].split(",") if c.strip()]
+                with state.lock:
+                    state.stats["add"] += 1
+                self._send(200, json.dumps(state.add_items(crns, form.get("term", [""])[0])))
+            elif endpoint == "/classRegistration/submitRegistration/batch":
+                time.sleep(state.submit_latency())
+                if self._maybe_fail():
+                    return
+                try:
+                    payload = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, json.dumps({"success": False, "message": "Bad JSON"}))
+                    return
+                with state.lock:
+                    state.stats["submit"] += 1
+                result = state.submit(self.headers.get("Cookie", ""), payload.get("update", []))
+                self._send(200, json.dumps(result))
+            elif endpoint == "/classSearch/resetDataForm":
+                self._send(200, "true")
+            elif endpoint == "/term/search":
+                form = parse_qs(body.decode("utf-8"))
+                term = form.get("term", [""])[0]
+                if term not in {t["code"] for t in MOCK_TERMS}:
+                    self._send(200, json.dumps({"studentEligFailures": [f"Term {term} is not open for registration"]}))
+                    return
+                with state.lock:
+                    state.primed[self.headers.get("Cookie", "")] = (term, form.get("uniqueSessionId", [""])[0])
+                self._send(200, json.dumps({"fwdURL": f"{SSB_PATH}/classRegistration/classRegistration"}))
+            elif endpoint == "/searchResults/getEnrollmentInfo":
+                time.sleep(state.latency())
+                if self._maybe_fail():
+                    return
+                form = parse_qs(body.decode("utf-8"))
+                with state.lock:
+                    state.stats["enrollment"] += 1
+                self._send(200, state.enrollment_html(form.get("courseReferenceNumber", [""])[0]), "text/html")
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+    return MockHandler
+
+def start_mock_server(port: int = 0, host: str = "127.0.0.1", **options):
+    """Starts the mock server on a background thread.
+       Returns (server, state, base_url); call server.shutdown() to stop it.
+    """
+    state = MockSRS(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if state.contention > 0:
+        stop = threading.Event()
+        threading.Thread(target=state.contention_loop, args=(stop,), daemon=True).start()
+        server.contention_stop = stop
+    base_url = f"http://{host}:{server.server_address[1]}{SSB_PATH}"
+    return server, state, base_url
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Banner SRS registration endpoints")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--latency", default="fixed:0", help="Latency distribution in ms: fixed:50, uniform:20:80, normal:50:10, lognormal:50:0.5, exp:50")
+    parser.add_argument("--submit-latency", default="", help="Separate latency distribution for submitRegistration/batch")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503 (default 0)")
+    parser.add_argument("--seats", type=int, default=DEFAULT_SEATS, help=f"Seats per CRN unless overridden (default {DEFAULT_SEATS})")
+    parser.add_argument("--crn-seats", default="", help="Per-CRN seats, e.g. '11038=2,10961=0'")
+    parser.add_argument("--only-crns", default="", help="Comma-separated CRNs that exist; others are 'Invalid CRN' (default: any numeric CRN)")
+    parser.add_argument("--contention", type=float, default=0.0, help="Seats taken by simulated other students per second (default 0)")
+    parser.add_argument("--catalog-size", type=int, default=0, help="Generated sections (CRNs 10000 and up) listed by class search, besides --crn-seats/--only-crns (default 0)")
+    parser.add_argument("--session-ttl", type=float, default=0.0, help="Seconds each cookie stays logged in before requests redirect to the login page (default 0 = never expires)")
+    args = parser.parse_args()
+
+    known = {c.strip() for c in args.only_crns.split(",") if c.strip()} or None
+    server, state, base_url = start_mock_server(
+        port=args.port, seats=parse_seats(args.crn_seats), default_seats=args.seats,
+        latency=args.latency, submit_latency=args.submit_latency, error_rate=args.error_rate,
+        known_crns=known, contention=args.contention, session_ttl=args.session_ttl,
+        catalog_size=args.catalog_size)
+    print("Mock SRS listening. Point the bot at it with:")
+    print(f"  SRS_BASE_URL={base_url} python3 test_registration.py ...")
+    print(f"  python3 test_registration.py --base-url {base_url} ...")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"[stats] {state.stats}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
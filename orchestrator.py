@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import fetch_srs_config
+
+# Rough resident memory of one headless Edge + msedgedriver on the SRS pages
+EDGE_MEMORY_MB = 500
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FETCH_SCRIPT = os.path.join(SCRIPT_DIR, "fetch_srs_config.py")
+REGISTER_SCRIPT = os.path.join(SCRIPT_DIR, "test_registration.py")
+
+def _total_memory_mb() -> int | None:
+    """Total physical memory in MB, or None if it can't be determined."""
+    try:
+        if platform.system() == "Windows":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullTotalPhys // (1024 * 1024)
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except Exception:
+        return None
+
+def default_browser_limit() -> int:
+    """How many headless Edge instances to run at once: one per two cores,
+       bounded by half of physical memory at EDGE_MEMORY_MB each.
+    """
+    cpu_limit = max(1, (os.cpu_count() or 2) // 2)
+    memory_mb = _total_memory_mb()
+    if memory_mb is None:
+        return cpu_limit
+    memory_limit = max(1, (memory_mb // 2) // EDGE_MEMORY_MB)
+    return min(cpu_limit, memory_limit)
+
+def load_accounts(path: str) -> list[dict]:
+    """Loads the account list: a JSON list, or an object with an "accounts" list."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("accounts", [])
+    if not isinstance(data, list):
+        raise ValueError("accounts file must contain a list of account configs")
+    accounts = []
+    for i, account in enumerate(data):
+        if not isinstance(account, dict):
+            raise ValueError(f"account #{i + 1} is not an object")
+        account = dict(account)
+        account.setdefault("name", account.get("email") or f"account{i + 1}")
+        accounts.append(account)
+    return accounts
+
+def _safe_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+def browser_user_data_dir(account: dict) -> str | None:
+    """The user data directory the account's Edge will open, or None when it attaches to an
+       already running Edge over debug_port (nothing is launched, so nothing can collide).
+    """
+    if account.get("debug_port"):
+        return None
+    path = account.get("user_data_dir") or fetch_srs_config.get_edge_user_data_dir()
+    return os.path.normcase(os.path.abspath(os.path.expanduser(path)))
+
+def has_crns(account: dict) -> bool:
+    return any(account.get("crn_groups") or []) or bool(account.get("crn_list"))
+
+def has_browser_profile(account: dict) -> bool:
+    """Without one of these, fetch_srs_config.py would open bot_config.json's email profile."""
+    return any(account.get(key) for key in ("email", "profile_directory", "debug_port"))
+
+def build_fetch_args(account: dict, output: str) -> list[str]:
+    args = [sys.executable, FETCH_SCRIPT, "--term", account["term_name"], "--output", output]
+    for key, flag in (("email", "--email"), ("user_data_dir", "--user-data-dir"),
+                      ("profile_directory", "--profile-directory"), ("edge_driver", "--edge-driver"),
+                      ("debug_port", "--debug-port")):
+        if account.get(key):
+            args += [flag, str(account[key])]
+    return args + notify_args(account)
+
+def notify_args(account: dict) -> list[str]:
+    """Always passed, empty when unset, so a child never falls back to bot_config.json's webhook."""
+    return ["--webhook", str(account.get("webhook_url") or ""),
+            "--discord-user", str(account.get("discord_user_id") or "")]
+
+def build_register_args(account: dict, results_path: str, store_path: str) -> list[str]:
+    args = [sys.executable, REGISTER_SCRIPT, "--term", str(account["term"]), "--results-json", results_path,
+            "--credentials", store_path]
+    if account.get("crn_groups"):
+        groups = ";".join(",".join(str(c) for c in group) for group in account["crn_groups"])
+        args += ["--groups", groups]
+    elif account.get("crn_list"):
+        args += ["--crns", ",".join(str(c) for c in account["crn_list"])]
+    args += notify_args(account)
+    args += [str(a) for a in account.get("register_args", [])]
+    return args
+
+def run_account(account: dict, run_dir: str, browser_slots: threading.Semaphore,
+                dir_lock=None) -> dict:
+    """Runs token extraction then registration for one account, each in its own process.
+       Everything the account writes (credentials.json, logs, results) stays in its run_dir.
+       dir_lock is shared by accounts whose Edge uses the same user data directory, since
+       Edge can only run one instance per directory; their fetches run one at a time.
+    """
+    name = account["name"]
+    account_dir = os.path.join(run_dir, _safe_name(name))
+    os.makedirs(account_dir, exist_ok=True)
+    store_path = os.path.join(account_dir, "credentials.json")
+    results_path = os.path.join(account_dir, "results.json")
+    summary = {"name": name, "fetch_ok": False, "register_ok": False, "success": False,
+               "results": [], "dir": account_dir}
+    if not has_crns(account):
+        # Without CRN flags test_registration.py would fall back to bot_config.json's list
+        print(f"[{name}] No crn_list or crn_groups configured; skipping this account.")
+        summary["error"] = "no CRNs configured"
+        return summary
+    if not has_browser_profile(account):
+        print(f"[{name}] No email, profile_directory or debug_port configured; skipping this account.")
+        summary["error"] = "no browser profile configured"
+        return summary
+
+    start = time.perf_counter()
+    # Wait for the user data directory before taking a browser slot, so waiting doesn't hold one
+    with dir_lock or contextlib.nullcontext():
+        # Only the browser step is heavy, so only it is bounded by the browser limit
+        with browser_slots:
+            print(f"[{name}] Fetching SRS configuration...")
+            with open(os.path.join(account_dir, "fetch.log"), "w", encoding="utf-8") as log_file:
+                fetch = subprocess.run(build_fetch_args(account, store_path), cwd=account_dir,
+                                       stdout=log_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    summary["fetch_seconds"] = round(time.perf_counter() - start, 2)
+    summary["fetch_ok"] = fetch.returncode == 0 and os.path.exists(store_path)
+    if not summary["fetch_ok"]:
+        print(f"[{name}] Token extraction failed (see {account_dir}/fetch.log)")
+        return summary
+
+    print(f"[{name}] Registering...")
+    with open(os.path.join(account_dir, "register.log"), "w", encoding="utf-8") as log_file:
+        register = subprocess.run(build_register_args(account, results_path, store_path), cwd=account_dir,
+                                  stdout=log_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    summary["register_ok"] = register.returncode == 0
+    try:
+        with open(results_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        summary["results"] = data.get("results", [])
+        summary["success"] = bool(data.get("success"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    summary["total_seconds"] = round(time.perf_counter() - start, 2)
+    print(f"[{name}] Done ({'registered' if summary['success'] else 'nothing registered'})")
+    return summary
+
+def print_summary(summaries: list[dict]):
+    print(f"\n{'='*60}")
+    print("Orchestrator Summary")
+    print(f"{'='*60}")
+    for s in summaries:
+        registered = [r["crn"] for r in s["results"] if r.get("success")]
+        failed = [r["crn"] for r in s["results"] if not r.get("success")]
+        if s.get("error"):
+            status = f"SKIPPED ({s['error']})"
+        else:
+            status = "OK" if s["success"] else ("FETCH FAILED" if not s["fetch_ok"] else "NO REGISTRATION")
+        print(f"{s['name']}: {status}")
+        if registered:
+            print(f"   registered: {', '.join(registered)}")
+        if failed:
+            print(f"   failed:     {', '.join(failed)}")
+    ok = sum(1 for s in summaries if s["success"])
+    print(f"\n{ok}/{len(summaries)} account(s) registered at least one course.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run token extraction and registration for many accounts in parallel")
+    parser.add_argument("accounts", help="JSON file with a list of account configs (name, email, user_data_dir, profile_directory, term_name, term, crn_list/crn_groups, webhook_url, discord_user_id)")
+    parser.add_argument("--run-dir", default="runs", help="Directory for per-account outputs (default ./runs)")
+    parser.add_argument("--max-browsers", type=int, help="Headless Edge instances to run at once (default derived from CPU count and RAM)")
+    parser.add_argument("--summary-json", help="Also write the combined summary to this file (default <run-dir>/summary.json)")
+    args = parser.parse_args()
+
+    try:
+        accounts = load_accounts(args.accounts)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not load accounts ({e}).")
+        sys.exit(1)
+    missing = [a["name"] for a in accounts if not a.get("term_name") or not a.get("term")]
+    if missing:
+        print(f"Error: term_name and term are required for: {', '.join(missing)}")
+        sys.exit(1)
+    # Accounts without a user_data_dir all launch Edge's default one, so group by the real path
+    dir_locks = {}
+    for account in accounts:
+        path = browser_user_data_dir(account)
+        if path is not None:
+            dir_locks.setdefault(path, []).append(account["name"])
+    for path, names in dir_locks.items():
+        if len(names) > 1:
+            print(f"Note: {', '.join(names)} share the Edge user data dir {path}; their fetches run one at a time.")
+    dir_locks = {path: threading.Lock() for path in dir_locks}
+
+    browser_limit = max(1, args.max_browsers or default_browser_limit())
+    print(f"Running {len(accounts)} account(s), at most {browser_limit} browser(s) at once.")
+    os.makedirs(args.run_dir, exist_ok=True)
+    browser_slots = threading.Semaphore(browser_limit)
+
+    with ThreadPoolExecutor(max_workers=len(accounts) or 1, thread_name_prefix="account") as executor:
+        summaries = list(executor.map(
+            lambda a: run_account(a, os.path.abspath(args.run_dir), browser_slots,
+                                  dir_locks.get(browser_user_data_dir(a))), accounts))
+
+    print_summary(summaries)
+    summary_path = args.summary_json or os.path.join(args.run_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"accounts": summaries}, f, indent=2)
+    print(f"Summary written to {summary_path}")
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,14 @@ setlocal EnableExtensions EnableDelayedExpansion
 rem Reads shared config from bot_config.json:
 rem   webhook_url, discord_user_id, email, edge_driver
 rem Required args: --term-name, --term-code, --crn
-rem Optional args: --debug-port, --head
+rem Optional args: --debug-port, --head, --at (fire registration at this time)
 
 set "DEBUG_PORT="
 set "HEAD="
 set "TERM_NAME="
 set "TERM_CODE="
 set "CRN="
+set "AT="
 
 :parse
 if "%~1"=="" goto doneparse
@@ -20,6 +21,10 @@ if /I "%~1"=="--term-name" (set "TERM_NAME=%~2" & shift & shift & goto parse)
 if /I "%~1"=="--term-code" (set "TERM_CODE=%~2" & shift & shift & goto parse)
 if /I "%~1"=="--crn" (set "CRN=%~2" & shift & shift & goto parse)
 if /I "%~1"=="--head" (set "HEAD=1" & shift & goto parse)
+if /I "%~1"=="--at" (
+    if "%~2"=="" goto usage
+    set "AT=%~2" & shift & shift & goto parse
+)
 
 echo Unknown argument: %~1
 goto usage
@@ -29,26 +34,27 @@ if "%TERM_NAME%"=="" goto usage
 if "%TERM_CODE%"=="" goto usage
 if "%CRN%"=="" goto usage
 
-echo "=========================================="
-echo "      Starting Course Registration Bot    "
-echo "=========================================="
 call Scripts\activate.bat
 
 set "FETCH_ARGS=--term "%TERM_NAME%""
 if not "%DEBUG_PORT%"=="" set "FETCH_ARGS=%FETCH_ARGS% --debug-port "%DEBUG_PORT%""
 if "%HEAD%"=="1" set "FETCH_ARGS=%FETCH_ARGS% --head"
 
-python fetch_srs_config.py %FETCH_ARGS%
-
 set "REG_ARGS=--crn "%CRN%" --term "%TERM_CODE%""
+if not "%AT%"=="" set "REG_ARGS=%REG_ARGS% --at "%AT%""
 
-python test_registration.py %REG_ARGS%
+rem Token extraction and registration run in one process; credentials are passed in memory
+python run_pipeline.py %FETCH_ARGS% -- %REG_ARGS%
+set "STATUS=%ERRORLEVEL%"
 
-endlocal
-exit /b 0
+rem run_pipeline.py exits 1 if token extraction failed and 2 if nothing registered;
+rem like before, only a failed extraction is an error for this script
+if "%STATUS%"=="2" set "STATUS=0"
+
+endlocal & exit /b %STATUS%
 
 :usage
 echo Usage:
-echo   .\run_bot.bat --term-name "Spring Semester 2026" --term-code 202601 --crn 11038 [--debug-port ^<port^>] [--head]
+echo   .\run_bot.bat --term-name "Spring Semester 2026" --term-code 202601 --crn 11038 [--debug-port ^<port^>] [--head] [--at ^<time^>]
 endlocal
 exit /b 1
\ No newline at end of file
@@ -9,30 +9,35 @@ fi
 
 echo "(Config) Using ./bot_config.json for webhook/user/email/edge_driver."
 
-# Pass-through args for python scripts (e.g. --debug-port, --head)
-PASSTHROUGH_ARGS=("$@")
-
-echo "=========================================="
-echo "      Starting Course Registration Bot    "
-echo "=========================================="
-
-# Step 1: Run Selenium to fetch tokens
-echo ""
-echo "[Step 1] Fetching SRS Configuration..."
-# Pass all script arguments (${PASSTHROUGH_ARGS[@]}) to the python script so --debug-port and others work
-python3 fetch_srs_config.py --term "Spring Semester 2026" "${PASSTHROUGH_ARGS[@]}"
-
-# Check if the config file was created
-if [ ! -f config_dump.txt ]; then
-    echo "Error: config_dump.txt was not created. Aborting."
-    exit 1
+# Pass-through args (e.g. --debug-port, --head)
+# --at <time> is for the registration step (fire at window open), everything else goes to token extraction
+PASSTHROUGH_ARGS=()
+REG_ARGS=()
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --at)
+            if [ $# -lt 2 ]; then
+                echo "Usage: ./run_bot.sh [--at <time>] [token extraction options, e.g. --debug-port <port> --head]"
+                exit 1
+            fi
+            REG_ARGS+=("--at" "$2")
+            shift 2
+            ;;
+        *)
+            PASSTHROUGH_ARGS+=("$1")
+            shift
+            ;;
+    esac
+done
+
+# Token extraction and registration run in one process (run_pipeline.py);
+# the credentials are passed in memory, so there is no credential file round trip
+python3 run_pipeline.py --term-name "Spring Semester 2026" "${PASSTHROUGH_ARGS[@]}" -- "${REG_ARGS[@]}"
+STATUS=$?
+
+# run_pipeline.py exits 1 if token extraction failed and 2 if nothing registered.
+# Like before, only a failed extraction is an error for this script.
+if [ $STATUS -eq 2 ]; then
+    STATUS=0
 fi
-
-# Step 2: Run Registration
-echo ""
-echo "[Step 2] Running Registration Script..."
-echo "Using CRN list and term from bot_config.json"
-python3 test_registration.py
-
-echo ""
-echo "Done."
+exit $STATUS
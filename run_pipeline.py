@@ -0,0 +1,67 @@
+import sys
+import time
+import shlex
+import argparse
+import fetch_srs_config
+import test_registration
+
+USAGE = """python run_pipeline.py [--term-name NAME] [--term-code CODE] [fetch args...] [-- registration args...]
+
+Fetches SRS credentials and registers in one process; the cookie, token and
+session ID are handed over in memory instead of being re-read from the credential store.
+
+  fetch args         anything fetch_srs_config.py accepts (--debug-port, --head, --email, ...)
+  registration args  anything test_registration.py accepts (--crns, --groups, --at, --batch, ...)
+
+Example:
+  python run_pipeline.py --term-name "Spring Semester 2026" --term-code 202601 --debug-port 9222 -- --crns 11038,10961
+"""
+
+def split_args(argv: list[str]) -> tuple[list[str], list[str]]:
+    """Splits argv at the first '--' into (fetch args, registration args)."""
+    if "--" in argv:
+        i = argv.index("--")
+        return argv[:i], argv[i + 1:]
+    return argv, []
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    front, register_args = split_args(argv)
+
+    # No prefix matching: '--term' must reach fetch_srs_config.py, not match --term-name/--term-code
+    parser = argparse.ArgumentParser(usage=USAGE, add_help=False, allow_abbrev=False)
+    parser.add_argument("--term-name", help="Term to select in the browser (e.g. 'Spring Semester 2026')")
+    parser.add_argument("--term-code", help="Term code to register for (e.g. 202601; otherwise bot_config.json)")
+    parser.add_argument("-h", "--help", action="store_true")
+    args, fetch_args = parser.parse_known_args(front)
+    if args.help:
+        print(USAGE)
+        return 0
+
+    if args.term_name:
+        fetch_args = ["--term", args.term_name] + fetch_args
+    if args.term_code:
+        register_args = ["--term", args.term_code] + register_args
+    # If the session expires mid-run, registration re-runs the same extraction
+    if "--refresh-fetch" not in register_args:
+        register_args += ["--refresh-fetch", shlex.join(fetch_args)]
+
+    print("==========================================")
+    print("      Starting Course Registration Bot    ")
+    print("==========================================")
+
+    start = time.perf_counter()
+    # Edge is shut down in the background so registration doesn't wait for it
+    config = fetch_srs_config.fetch_config(fetch_args, background_cleanup=True)
+    if not config:
+        print("Error: token extraction failed. Aborting.")
+        return 1
+    handoff = time.perf_counter()
+    print(f"Credentials ready after {handoff - start:.2f}s, handing over in memory.")
+
+    success = test_registration.test_add_course(register_args, credentials_config=config)
+    print(f"\nDone in {time.perf_counter() - start:.2f}s.")
+    return 0 if success else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import time
+import threading
+
+# Largest page the SRS class search hands out in one response
+DEFAULT_PAGE_SIZE = 500
+
+# A subject refreshed more recently than this is served from the index
+DEFAULT_MAX_AGE = 30.0
+
+# Class search fields kept per section
+SECTION_FIELDS = ("subject", "courseNumber", "courseTitle", "seatsAvailable", "maximumEnrollment",
+                  "enrollment", "waitAvailable", "waitCount", "waitCapacity", "openSection",
+                  "isSectionLinked", "linkIdentifier")
+
+def _section(record: dict) -> dict:
+    return {field: record.get(field) for field in SECTION_FIELDS}
+
+class SeatIndex:
+    """In-memory view of a term's class search results, keyed by CRN.
+
+       fetch_page(params) performs one searchResults/searchResults GET (adding the session's
+       uniqueSessionId) and returns its JSON; reset() clears the server-side search form.
+       Banner keeps one search per session and pages through it with pageOffset, so searches
+       are serialized by a lock.
+    """
+
+    def __init__(self, term: str, fetch_page, reset=None,
+                 page_size: int = DEFAULT_PAGE_SIZE, max_age: float = DEFAULT_MAX_AGE):
+        self.term = term
+        self.fetch_page = fetch_page
+        self.reset = reset
+        self.page_size = page_size
+        self.max_age = max_age
+        self.sections = {}      # crn -> section fields
+        self.refreshed_at = {}  # subject -> monotonic time of the last search ("" = whole term)
+        self.lock = threading.Lock()
+
+    def _search(self, subject: str = "") -> int:
+        """Pages through one search and updates the index as each page arrives. Returns sections seen."""
+        if self.reset:
+            self.reset()
+        offset = 0
+        seen = 0
+        while True:
+            params = {
+                "txt_term": self.term,
+                "txt_subject": subject,
+                "startDatepicker": "",
+                "endDatepicker": "",
+                "pageOffset": offset,
+                "pageMaxSize": self.page_size,
+                "sortColumn": "subjectDescription",
+                "sortDirection": "asc",
+            }
+            page = self.fetch_page(params)
+            records = page.get("data") or []
+            for record in records:
+                crn = str(record.get("courseReferenceNumber", ""))
+                if crn:
+                    self.sections[crn] = _section(record)
+            seen += len(records)
+            offset += len(records)
+            total = page.get("totalCount") or 0
+            if not records or offset >= total:
+                return seen
+
+    def build(self) -> int:
+        """Indexes every section of the term. Returns how many were indexed."""
+        with self.lock:
+            start = time.perf_counter()
+            count = self._search()
+            now = time.monotonic()
+            self.refreshed_at = {"": now}
+            for section in self.sections.values():
+                self.refreshed_at[section["subject"]] = now
+        print(f"[INDEX] Indexed {count} section(s) for term {self.term} in {time.perf_counter() - start:.2f}s")
+        return count
+
+    def refresh_subjects(self, subjects, force: bool = False) -> int:
+        """Re-searches only the given subjects, skipping ones refreshed within max_age."""
+        count = 0
+        with self.lock:
+            for subject in sorted(set(subjects)):
+                last = self.refreshed_at.get(subject)
+                if not force and last is not None and time.monotonic() - last < self.max_age:
+                    continue
+                count += self._search(subject)
+                self.refreshed_at[subject] = time.monotonic()
+        return count
+
+    def refresh_crns(self, crns: list[str], force: bool = False) -> int:
+        """Refreshes the subjects these CRNs belong to. The whole term is only searched
+           if it never was; CRNs it didn't list stay unknown.
+        """
+        if "" not in self.refreshed_at:
+            return self.build()
+        subjects = {self.sections[crn]["subject"] for crn in crns if crn in self.sections}
+        return self.refresh_subjects(subjects, force=force)
+
+    def seats(self, crn: str) -> int | None:
+        section = self.sections.get(crn)
+        if section is None or section["seatsAvailable"] is None:
+            return None
+        return int(section["seatsAvailable"])
+
+    def is_full(self, crn: str) -> bool:
+        """True only when the index knows the section has no open seats."""
+        seats = self.seats(crn)
+        return seats is not None and seats <= 0
+
+    def seat_counts(self, crns: list[str], force: bool = False) -> dict:
+        """{crn: seats or None} from the index, after refreshing the CRNs' subjects
+           (only stale ones unless force).
+        """
+        self.refresh_crns(crns, force=force)
+        return {crn: self.seats(crn) for crn in crns}
+
+    def without_full(self, crns: list[str]) -> tuple[list[str], list[str]]:
+        """Splits CRNs into (worth trying, known full), keeping their order."""
+        keep = [crn for crn in crns if not self.is_full(crn)]
+        skipped = [crn for crn in crns if self.is_full(crn)]
+        return keep, skipped
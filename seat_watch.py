@@ -0,0 +1,124 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Poll interval bounds (seconds); the interval adapts between them
+DEFAULT_MIN_INTERVAL = 2.0
+DEFAULT_MAX_INTERVAL = 30.0
+
+# Error backoff bounds (seconds)
+DEFAULT_BACKOFF_BASE = 2.0
+DEFAULT_BACKOFF_CAP = 300.0
+
+# How often to re-open idle keep-alive connections while watching
+DEFAULT_KEEPALIVE_INTERVAL = 60.0
+
+class AdaptiveInterval:
+    """Poll interval that drops to the minimum when seat counts move and
+       slowly grows towards the maximum while nothing changes.
+    """
+
+    def __init__(self, minimum: float = DEFAULT_MIN_INTERVAL, maximum: float = DEFAULT_MAX_INTERVAL,
+                 growth: float = 1.5):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.growth = growth
+        self.current = minimum
+
+    def on_change(self):
+        self.current = self.minimum
+
+    def on_idle(self):
+        self.current = min(self.maximum, self.current * self.growth)
+
+    def next_delay(self) -> float:
+        # +/-20% jitter so many watchers don't poll in lockstep
+        return self.current * random.uniform(0.8, 1.2)
+
+def backoff_delay(failures: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter for the given number of consecutive failures."""
+    return random.uniform(0, min(cap, base * (2 ** max(0, failures - 1))))
+
+def watch_seats(groups: list[list[str]], poll, register,
+                min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                keepalive=None, keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL,
+                on_registered=None) -> list[dict]:
+    """Polls seat availability until every priority group has registered one CRN.
+
+       poll(crns) returns {crn: seats_available or None} for many CRNs at once and
+       raises on server errors (which trigger jittered backoff).
+       register(crn) runs the normal add → submit path and returns its result dict.
+       Within a group the first CRN (in priority order) with an open seat is tried;
+       groups with openings in the same poll register in parallel.
+       keepalive() is called periodically to keep idle connections warm.
+       on_registered(result) is called after each successful registration.
+       Returns the result of every registration attempt. Stops early on Ctrl+C.
+    """
+    pending = [list(group) for group in groups if group]
+    interval = AdaptiveInterval(min_interval, max_interval)
+    last_counts = {}
+    failures = 0
+    last_keepalive = time.monotonic()
+    results = []
+    # Per-CRN cooldown after a failed attempt, so a CRN that shows seats but keeps
+    # failing (e.g. a registration restriction) isn't retried on every poll
+    crn_failures = {}
+    retry_at = {}
+
+    print(f"Watching {sum(len(g) for g in pending)} CRN(s) in {len(pending)} group(s) for open seats...")
+    try:
+        while pending:
+            crns = [crn for group in pending for crn in group]
+            try:
+                counts = poll(crns)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = backoff_delay(failures)
+                print(f"[WATCH] Seat poll failed ({e}); backing off {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            changed = {crn for crn in crns if counts.get(crn) is not None and counts.get(crn) != last_counts.get(crn)}
+            if changed and last_counts:
+                print("[WATCH] Seat counts changed: " + ", ".join(f"{crn}={counts[crn]}" for crn in sorted(changed)))
+                interval.on_change()
+            else:
+                interval.on_idle()
+            last_counts.update({crn: seats for crn, seats in counts.items() if seats is not None})
+
+            # Pick the highest-priority CRN with an open seat in each group
+            attempts = []
+            now = time.monotonic()
+            for group in pending:
+                open_crn = next((crn for crn in group
+                                 if (counts.get(crn) or 0) > 0 and retry_at.get(crn, 0) <= now), None)
+                if open_crn:
+                    attempts.append((group, open_crn))
+
+            if attempts:
+                with ThreadPoolExecutor(max_workers=len(attempts), thread_name_prefix="watch-register") as executor:
+                    outcomes = list(executor.map(lambda attempt: register(attempt[1]), attempts))
+                for (group, crn), result in zip(attempts, outcomes):
+                    results.append(result)
+                    if result.get("success") or result.get("held"):
+                        # Registered now, or the server says the student already holds it
+                        pending.remove(group)
+                        if on_registered and result.get("success"):
+                            on_registered(result)
+                    else:
+                        crn_failures[crn] = crn_failures.get(crn, 0) + 1
+                        retry_at[crn] = time.monotonic() + backoff_delay(crn_failures[crn], base=min_interval)
+                # Seats are moving right now, so poll again quickly
+                interval.on_change()
+
+            if keepalive and time.monotonic() - last_keepalive >= keepalive_interval:
+                keepalive()
+                last_keepalive = time.monotonic()
+
+            if pending:
+                time.sleep(interval.next_delay())
+    except KeyboardInterrupt:
+        print("\n[WATCH] Stopped by user.")
+
+    return results
@@ -0,0 +1,216 @@
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+from collections import deque, Counter
+from http.client import responses
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+REDACTED = "<redacted>"
+
+# Request headers that carry the session; never written to a trace
+SENSITIVE_HEADERS = {"cookie", "x-synchronizer-token", "authorization"}
+# Response headers worth keeping (Date feeds the clock estimate, Location shows login redirects)
+KEPT_RESPONSE_HEADERS = {"content-type", "date", "location", "retry-after"}
+# Body fields and query parameters that identify the session
+SENSITIVE_FIELDS = {"uniqueSessionId"}
+# Query parameters that change on every request (jQuery cache busters) and are ignored when matching
+VOLATILE_PARAMS = {"_"}
+
+def _open(path: str, mode: str):
+    """Opens a trace file; a .gz suffix means gzip-compressed JSON lines."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def _decode(body) -> str:
+    if body is None:
+        return ""
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    return str(body)
+
+def redact_body(body: str) -> str:
+    """Replaces session identifiers in a JSON or form-encoded request body."""
+    if not body:
+        return body
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        pairs = parse_qsl(body, keep_blank_values=True)
+        if not pairs:
+            return body
+        return urlencode([(k, REDACTED if k in SENSITIVE_FIELDS else v) for k, v in pairs])
+    if isinstance(data, dict):
+        for field in SENSITIVE_FIELDS & data.keys():
+            data[field] = REDACTED
+    return json.dumps(data, separators=(",", ":"), sort_keys=True)
+
+def redact_url(url: str) -> str:
+    """Replaces session identifiers in a URL's query string (e.g. searchResults GETs)."""
+    parsed = urlparse(url)
+    if not parsed.query:
+        return url
+    pairs = parse_qsl(parsed.query, keep_blank_values=True)
+    if not any(k in SENSITIVE_FIELDS for k, _ in pairs):
+        return url
+    query = urlencode([(k, REDACTED if k in SENSITIVE_FIELDS else v) for k, v in pairs])
+    return urlunparse(parsed._replace(query=query))
+
+def request_key(method: str, url: str, body: str) -> str:
+    """What a replayed request is matched on: method, path, the query (volatile parameters
+       dropped, session IDs redacted) and the redacted, normalized body.
+    """
+    parsed = urlparse(url)
+    query = sorted((k, REDACTED if k in SENSITIVE_FIELDS else v)
+                   for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    return f"{method.upper()} {parsed.path}?{urlencode(query)} {redact_body(body)}"
+
+# ==========================================
+# RECORDING
+# ==========================================
+
+class TraceRecorder:
+    """Session response hook that appends every request/response pair to a trace file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = time.time()
+        self.lock = threading.Lock()
+        self.file = _open(path, "w")
+        self.count = 0
+
+    def hook(self, response, *args, **kwargs):
+        request = response.request
+        body = _decode(request.body)
+        record = {
+            "t": round(time.time() - self.start, 4),
+            "method": request.method,
+            "url": redact_url(request.url),
+            "req_headers": {k: (REDACTED if k.lower() in SENSITIVE_HEADERS else v)
+                            for k, v in request.headers.items()},
+            "req_body": redact_body(body),
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_RESPONSE_HEADERS},
+            "body": response.text,
+            "elapsed": round(response.elapsed.total_seconds(), 4),
+        }
+        with self.lock:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.file.flush()
+            self.count += 1
+        return response
+
+    def attach(self, session: requests.Session):
+        session.hooks["response"].append(self.hook)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+# ==========================================
+# REPLAY
+# ==========================================
+
+def load_trace(path: str) -> list[dict]:
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class ReplayAdapter(BaseAdapter):
+    """Answers requests from a recorded trace instead of the network.
+       Requests are matched on method, path and body (session IDs ignored); repeated identical
+       requests get the recorded responses in order. Unmatched requests fall back to the next
+       unused response for the same method and path, then to a 404.
+    """
+
+    def __init__(self, records: list[dict], latency: bool = False):
+        super().__init__()
+        self.latency = latency
+        self.exact = {}
+        self.by_path = {}
+        for record in records:
+            key = request_key(record["method"], record["url"], record.get("req_body", ""))
+            self.exact.setdefault(key, deque()).append(record)
+            path_key = f"{record['method'].upper()} {urlparse(record['url']).path}"
+            self.by_path.setdefault(path_key, deque()).append(record)
+        self.used = set()
+        self.misses = []
+        self.lock = threading.Lock()
+
+    def _take(self, queue_: deque) -> dict | None:
+        while queue_:
+            record = queue_.popleft()
+            if id(record) not in self.used:
+                self.used.add(id(record))
+                return record
+        return None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = _decode(request.body)
+        with self.lock:
+            record = self._take(self.exact.get(request_key(request.method, request.url, body), deque()))
+            if record is None:
+                path_key = f"{request.method.upper()} {urlparse(request.url).path}"
+                record = self._take(self.by_path.get(path_key, deque()))
+            if record is None:
+                self.misses.append(f"{request.method} {redact_url(request.url)}")
+        if record and self.latency:
+            time.sleep(record.get("elapsed", 0))
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        if record:
+            response.status_code = record["status"]
+            response.headers = CaseInsensitiveDict(record.get("headers", {}))
+            response._content = record.get("body", "").encode("utf-8")
+        elif request.method.upper() == "HEAD":
+            # Warm-up and keep-alive probes are harmless to answer blindly
+            response.status_code = 200
+            response.headers = CaseInsensitiveDict()
+            response._content = b""
+        else:
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = json.dumps({"error": "not in trace"}).encode("utf-8")
+        response.reason = responses.get(response.status_code, "")
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+    def mount(self, session: requests.Session):
+        session.mount("https://", self)
+        session.mount("http://", self)
+
+# ==========================================
+# CLI
+# ==========================================
+
+def summarize(path: str):
+    records = load_trace(path)
+    print(f"{path}: {len(records)} request(s) over {records[-1]['t'] if records else 0:.1f}s")
+    counts = Counter((r["method"], urlparse(r["url"]).path.rsplit("/", 1)[-1] or "/", r["status"]) for r in records)
+    for (method, endpoint, status), count in sorted(counts.items()):
+        elapsed = [r["elapsed"] for r in records if r["method"] == method and r["status"] == status
+                   and (urlparse(r["url"]).path.rsplit("/", 1)[-1] or "/") == endpoint]
+        print(f"  {method:<5} {endpoint:<28} {status}  x{count:<4} avg {sum(elapsed) / len(elapsed) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect SRS traces written by test_registration.py --record")
+    parser.add_argument("trace", help="Trace file (.jsonl or .jsonl.gz)")
+    args = parser.parse_args()
+    try:
+        summarize(args.trace)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: could not read trace ({e})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
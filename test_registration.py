@@ -2,7 +2,28 @@ import requests
 import json
 import sys
 import os
+import time
+import socket
+import ssl
 import argparse
+import threading
+import math
+import re
+import shlex
+import subprocess
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+import credentials
+import discord_notifier
+import metrics
+import seat_index
+import seat_watch
+import srs_trace
 
 # Configured via CLI args
 DISCORD_WEBHOOK_URL = ""
@@ -43,111 +64,1320 @@ def log(message):
     LOG_BUFFER.append(message)
 
 def send_discord_buffer(ping_user=False):
-    """Sends the accumulated logs as a single code block message.
+    """Queues the accumulated logs as a code block message and empties the buffer.
        If ping_user is True, appends the ping OUTSIDE the code block.
+       Posting happens on the notifier thread, so this never waits on Discord.
     """
-    if not DISCORD_WEBHOOK_URL or "YOUR_DISCORD_WEBHOOK_URL" in DISCORD_WEBHOOK_URL:
-        return
-    
     if not LOG_BUFFER:
         return
-
-    def _chunk_text(text: str, max_len: int) -> list[str]:
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = min(start + max_len, len(text))
-            chunks.append(text[start:end])
-            start = end
-        return chunks
-
-    full_log_text = "\n".join(LOG_BUFFER)
-    # Discord message limit is ~2000 chars; reserve room for code block and ping
-    reserve = 10
-    if ping_user and DISCORD_USER_ID:
-        reserve += len(DISCORD_USER_ID) + 5
-    max_body = max(1, 2000 - reserve)
-
-    try:
-        chunks = _chunk_text(full_log_text, max_body)
-        for i, chunk in enumerate(chunks):
-            content = f"```\n{chunk}\n```"
-            # Only ping on the final chunk
-            if ping_user and DISCORD_USER_ID and i == len(chunks) - 1:
-                content += f"\n<@{DISCORD_USER_ID}>"
-            requests.post(DISCORD_WEBHOOK_URL, json={"content": content})
-    except Exception as e:
-        print(f"Failed to log to Discord: {e}")
+    notifier = discord_notifier.get_notifier(DISCORD_WEBHOOK_URL, DISCORD_USER_ID)
+    notifier.send("\n".join(LOG_BUFFER), ping_user=ping_user, code_block=True)
+    LOG_BUFFER.clear()
 
 # ==========================================
 # CONFIGURATION
 # ==========================================
-def load_config():
-    config = {}
+def load_config(path: str = credentials.STORE_PATH, profile: str = credentials.DEFAULT_PROFILE) -> dict:
     try:
-        with open('config_dump.txt', 'r') as f:
-            content = f.read()
-            
-        # Parse simple key=value format from dump
-        # The dump format implies keys are followed by values on newlines
-        lines = content.split('\n')
-        current_key = None
-        for line in lines:
-            if line.strip() in ['COOKIE=', 'TOKEN=', 'SESSION_ID=']:
-                current_key = line.strip().replace('=', '')
-            elif current_key and line.strip():
-                config[current_key] = line.strip()
-                current_key = None # Reset after reading value
-                
-        return config
+        return credentials.load_credentials(profile, path)
     except FileNotFoundError:
-        print("Error: config_dump.txt not found. Please run fetch_srs_config.py first.")
+        print(f"Error: no credentials for '{profile}' in {path}. Please run fetch_srs_config.py first.")
         sys.exit(1)
 
-config = load_config()
+# Filled in by apply_credentials(); nothing is read at import time
+config = {}
+HEADERS = {}
+UNIQUE_SESSION_ID = ""
+
+def apply_credentials(new_config: dict):
+    """Installs cookie, synchronizer token and session ID for every following SRS request.
+       HEADERS is updated in place so existing references see the new values.
+    """
+    global config
+    global UNIQUE_SESSION_ID
+    config = new_config
+    HEADERS.clear()
+    HEADERS.update({
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36',
+        'X-Synchronizer-Token': config.get('TOKEN', 'REPLACE_WITH_YOUR_TOKEN'),
+        'Cookie': config.get('COOKIE', 'REPLACE_WITH_YOUR_FULL_COOKIE_STRING'),
+        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+        'X-Requested-With': 'XMLHttpRequest',
+        'Referer': 'https://srs-owlexpress.kennesaw.edu/StudentRegistrationSsb/ssb/classRegistration/classRegistration',
+        'Origin': 'https://srs-owlexpress.kennesaw.edu'
+    })
+    UNIQUE_SESSION_ID = config.get('SESSION_ID', 'REPLACE_WITH_UNIQUE_SESSION_ID')
+
+BASE_URL = credentials.SRS_BASE_URL
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36',
-    'X-Synchronizer-Token': config.get('TOKEN', 'REPLACE_WITH_YOUR_TOKEN'),
-    'Cookie': config.get('COOKIE', 'REPLACE_WITH_YOUR_FULL_COOKIE_STRING'),
-    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-    'X-Requested-With': 'XMLHttpRequest',
-    'Referer': 'https://srs-owlexpress.kennesaw.edu/StudentRegistrationSsb/ssb/classRegistration/classRegistration',
-    'Origin': 'https://srs-owlexpress.kennesaw.edu'
+# ==========================================
+# HTTP SESSION (keep-alive connection pool)
+# ==========================================
+DEFAULT_POOL_SIZE = 4
+
+# Shared session for the registration hot path (built in test_add_course)
+SESSION = None
+
+# Per-request timings, only collected when --timing is set
+TIMING_ENABLED = False
+REQUEST_TIMINGS = []
+
+# Wall-clock time the first registration request was sent (used to report firing accuracy)
+FIRST_REQUEST_AT = None
+
+def build_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Creates a session that keeps up to pool_size connections to the SRS host alive."""
+    session = requests.Session()
+    # With --metrics-* the adapter also records DNS/connect/TLS/TTFB per request
+    adapter_cls = metrics.TimedHTTPAdapter if metrics.RECORDER else HTTPAdapter
+    adapter = adapter_cls(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def warm_session(session: requests.Session, pool_size: int) -> list[float]:
+    """Opens pool_size connections up front so the first CRN doesn't pay for TCP+TLS.
+       Requests are fired concurrently so each one checks out its own connection.
+       Returns the elapsed time (seconds) of each warm-up request.
+    """
+    parsed = urlparse(BASE_URL)
+    warm_url = f"{parsed.scheme}://{parsed.netloc}/"
+    elapsed = []
+
+    def _warm():
+        try:
+            start = time.perf_counter()
+            # Bare request: the warm-up only needs the connection, not the SRS cookie
+            session.head(warm_url, allow_redirects=False, timeout=10)
+            elapsed.append(time.perf_counter() - start)
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: Warm-up request failed ({e}).")
+
+    threads = [threading.Thread(target=_warm) for _ in range(max(1, pool_size))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return elapsed
+
+def measure_handshake(url: str) -> tuple[float, float]:
+    """Times a fresh TCP connect and TLS handshake to the host of url.
+       Returns (tcp_seconds, tls_seconds); tls is 0 for plain http.
+    """
+    parsed = urlparse(url)
+    host = parsed.hostname
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+
+    start = time.perf_counter()
+    sock = socket.create_connection((host, port), timeout=10)
+    tcp_time = time.perf_counter() - start
+    tls_time = 0.0
+    try:
+        if parsed.scheme == "https":
+            ctx = ssl.create_default_context()
+            start = time.perf_counter()
+            sock = ctx.wrap_socket(sock, server_hostname=host)
+            tls_time = time.perf_counter() - start
+    finally:
+        sock.close()
+    return tcp_time, tls_time
+
+def opened_connections(session: requests.Session) -> int:
+    """How many connections the session's pools have opened so far (urllib3 counts each new one)."""
+    total = 0
+    for adapter in set(session.adapters.values()):
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools.get(key)
+            total += getattr(pool, "num_connections", 0) if pool else 0
+    return total
+
+def print_timing_report(handshake: tuple[float, float] | None, warm_count: int = 0,
+                        hot_requests: int = 0, hot_connections: int = 0):
+    """Prints the cost of a fresh handshake next to the pooled request times.
+       warm_count is how many warm-up requests ran before the window; hot_requests and
+       hot_connections are the requests sent and connections opened after it.
+    """
+    print(f"\n{'='*50}")
+    print("Timing Report")
+    print(f"{'='*50}")
+    if handshake:
+        tcp_time, tls_time = handshake
+        print(f"Fresh handshake: {(tcp_time + tls_time) * 1000:.1f} ms (TCP {tcp_time * 1000:.1f} ms + TLS {tls_time * 1000:.1f} ms)")
+    else:
+        print("Fresh handshake: not measured")
+    if not REQUEST_TIMINGS:
+        print("No registration requests were timed.")
+        return
+    for endpoint, elapsed in REQUEST_TIMINGS:
+        print(f" - {endpoint}: {elapsed * 1000:.1f} ms")
+    avg = sum(e for _, e in REQUEST_TIMINGS) / len(REQUEST_TIMINGS)
+    print(f"Pooled requests: {len(REQUEST_TIMINGS)}, average {avg * 1000:.1f} ms")
+    if handshake:
+        fresh = handshake[0] + handshake[1]
+        reused = max(0, hot_requests - hot_connections)
+        print(f"Handshakes avoided by the pool: ~{reused * fresh * 1000:.1f} ms total "
+              f"({reused}/{hot_requests} hot-path request(s) reused a connection)")
+        if warm_count:
+            print(f"Warm-up: {warm_count} handshake(s), ~{warm_count * fresh * 1000:.1f} ms paid before the hot path")
+    if HEDGE_STATS["sent"]:
+        print(f"Hedged requests: {HEDGE_STATS['sent']} sent, {HEDGE_STATS['won']} answered first")
+
+# ==========================================
+# REQUEST POLICY (deadlines, hedging, retries)
+# ==========================================
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_REQUEST_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF_BASE = 0.2
+RETRY_BACKOFF_CAP = 2.0
+
+# Per-attempt read deadline, retry budget and hedge threshold (set in test_add_course)
+REQUEST_TIMEOUT = DEFAULT_REQUEST_TIMEOUT
+MAX_RETRIES = DEFAULT_RETRIES
+HEDGE_AFTER = None  # seconds; None disables hedging
+
+# Idempotency rules, per endpoint:
+#  - "replayable": repeating the request cannot change enrollment. Adding a CRN to the
+#    cart only stages it (the bot itself re-adds CRNs after a prefetch or a failed batch),
+#    getEnrollmentInfo is a read and resetDataForm only clears the search form. These may
+#    be hedged and are retried on connection errors, timeouts and 5xx.
+#  - "once": submitRegistration/batch registers courses. It is never hedged and is only
+#    retried when the connection could not be opened, i.e. the server never saw the request.
+#    A timeout or 5xx after sending may have been applied, so it is returned to the caller.
+# Endpoints not listed are treated as "once".
+REQUEST_POLICY = {
+    "addCRNRegistrationItems": "replayable",
+    "getEnrollmentInfo": "replayable",
+    "resetDataForm": "replayable",
+    "batch": "once",
 }
 
-UNIQUE_SESSION_ID = config.get('SESSION_ID', 'REPLACE_WITH_UNIQUE_SESSION_ID')
+HEDGE_STATS = {"sent": 0, "won": 0}
+_HEDGE_POOL = None
+_HEDGE_LOCK = threading.Lock()
+
+def request_policy(url: str) -> str:
+    return REQUEST_POLICY.get(url.rstrip("/").rsplit("/", 1)[-1], "once")
+
+def _never_sent(exc: Exception) -> bool:
+    """True if the request failed while opening the connection, before anything was sent."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.exceptions.ConnectionError) or not exc.args:
+        return False
+    reason = getattr(exc.args[0], "reason", None)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def _send(url: str, kwargs: dict, slot_held: bool = False) -> requests.Response:
+    """One POST through the shared session, recording the elapsed time when --timing is set
+       and per-phase timings when metrics are enabled.
+       Blocks while INFLIGHT_LIMIT requests are already on the wire, unless the caller
+       already acquired a slot for it (slot_held); the slot is released either way.
+    """
+    global FIRST_REQUEST_AT
+    session = SESSION or requests
+    limit = INFLIGHT_LIMIT
+    if limit and not slot_held:
+        limit.acquire()
+    phases = None
+    status = "error"
+    try:
+        if FIRST_REQUEST_AT is None:
+            FIRST_REQUEST_AT = time.time()
+        start = time.perf_counter()
+        phases = metrics.start_request()
+        response = session.post(url, **kwargs)
+        status = str(response.status_code)
+    finally:
+        if limit:
+            limit.release()
+        metrics.finish_request(url, phases, status)
+    if TIMING_ENABLED:
+        REQUEST_TIMINGS.append((url.rsplit("/", 1)[-1], time.perf_counter() - start))
+    return response
+
+def _send_hedged(url: str, kwargs: dict) -> requests.Response:
+    """Sends the request and, if no answer has arrived after HEDGE_AFTER seconds, a duplicate.
+       Returns the first non-5xx response; the slower copy finishes in the background.
+    """
+    global _HEDGE_POOL
+    with _HEDGE_LOCK:
+        if _HEDGE_POOL is None:
+            _HEDGE_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+    primary = _HEDGE_POOL.submit(_send, url, kwargs)
+    done, _ = wait([primary], timeout=HEDGE_AFTER)
+    if done:
+        return primary.result()
+
+    # Only hedge into a free in-flight slot; never queue behind other CRNs
+    limit = INFLIGHT_LIMIT
+    if limit and not limit.acquire(blocking=False):
+        return primary.result()
+    hedge = _HEDGE_POOL.submit(_send, url, kwargs, True)
+    with _HEDGE_LOCK:
+        HEDGE_STATS["sent"] += 1
+    pending = {primary, hedge}
+    fallback = None
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except requests.exceptions.RequestException as e:
+                error = error or e
+                continue
+            if response.status_code < 500:
+                if future is hedge:
+                    with _HEDGE_LOCK:
+                        HEDGE_STATS["won"] += 1
+                return response
+            fallback = response
+    if fallback is not None:
+        return fallback
+    if error is None:
+        error = requests.exceptions.RequestException(f"hedged request to {url} got no response")
+    raise error
+
+def _post(url: str, **kwargs) -> requests.Response:
+    """POSTs with a per-attempt deadline, following REQUEST_POLICY for hedging and retries.
+       Retries use bounded exponential backoff with jitter.
+       Raises SessionExpired when the server answers with a login redirect or auth error.
+    """
+    policy = request_policy(url)
+    endpoint = url.rsplit("/", 1)[-1]
+    kwargs.setdefault("timeout", (DEFAULT_CONNECT_TIMEOUT, REQUEST_TIMEOUT))
+    # Hold new requests while another thread swaps in fresh credentials
+    SESSION_READY.wait()
+    attempt = 0
+    while True:
+        try:
+            if policy == "replayable" and HEDGE_AFTER:
+                response = _send_hedged(url, kwargs)
+            else:
+                response = _send(url, kwargs)
+        except requests.exceptions.RequestException as e:
+            if policy == "replayable":
+                retryable = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+            else:
+                retryable = _never_sent(e)
+            if not retryable or attempt >= MAX_RETRIES:
+                raise
+            print(f"[RETRY] {endpoint}: {e.__class__.__name__} (attempt {attempt + 1}/{MAX_RETRIES + 1})")
+        else:
+            if session_expired(response):
+                raise SessionExpired(f"{endpoint}: HTTP {response.status_code} from {response.url}", response=response)
+            if policy != "replayable" or response.status_code < 500 or attempt >= MAX_RETRIES:
+                return response
+            print(f"[RETRY] {endpoint}: HTTP {response.status_code} (attempt {attempt + 1}/{MAX_RETRIES + 1})")
+        attempt += 1
+        time.sleep(seat_watch.backoff_delay(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP))
+
+def _get(url: str, params: dict | None = None) -> requests.Response:
+    """GET through the shared session with the same deadline, metrics and expiry check as _post.
+       Not retried; callers decide what a failed read means.
+    """
+    SESSION_READY.wait()
+    phases = metrics.start_request()
+    status = "error"
+    try:
+        response = (SESSION or requests).get(url, params=params, headers=HEADERS,
+                                             timeout=(DEFAULT_CONNECT_TIMEOUT, REQUEST_TIMEOUT))
+        status = str(response.status_code)
+    finally:
+        metrics.finish_request(url, phases, status)
+    if session_expired(response):
+        raise SessionExpired(f"{url.rsplit('/', 1)[-1]}: HTTP {response.status_code} from {response.url}", response=response)
+    return response
+
+# ==========================================
+# SESSION REFRESH (expired cookie/token mid-run)
+# ==========================================
+DEFAULT_SESSION_REFRESHES = 2
+REFRESH_FETCH_TIMEOUT = 90.0
+# After every source failed, callers fail fast for this long before a refresh is tried again
+REFRESH_RETRY_AFTER = 30.0
+
+# Where an expired Banner session ends up: the SSO/CAS login page
+LOGIN_URL_RE = re.compile(r"login|/cas/|saml|/sso|/idp/", re.IGNORECASE)
+
+# Endpoints that always answer a live session with JSON; HTML from them means a login page
+JSON_ENDPOINTS = {"addCRNRegistrationItems", "batch", "searchResults", "getRegistrationEvents"}
+
+# Ordered (name, callable) pairs returning a credentials dict or None (set in test_add_course)
+REFRESH_SOURCES = []
+MAX_SESSION_REFRESHES = DEFAULT_SESSION_REFRESHES
+
+# Bumped on every credential swap; callers remember the value they started with so only
+# the first thread to see an expired session refreshes and the others reuse its result
+CREDENTIALS_GENERATION = 0
+_REFRESH_FAILED_AT = None  # monotonic time of the last refresh where no source worked
+SESSION_REFRESH_LOCK = threading.Lock()
+# Cleared while a refresh is running so new requests don't go out with dead credentials
+SESSION_READY = threading.Event()
+SESSION_READY.set()
+
+class SessionExpired(requests.exceptions.RequestException):
+    """The server no longer accepts the cookie/synchronizer token (login redirect, HTML or 401/403)."""
+
+def session_expired(response: requests.Response) -> bool:
+    """True if a response shows the session is gone rather than a normal answer or server error."""
+    if response.status_code in (401, 403):
+        return True
+    if response.status_code >= 500:
+        return False
+    locations = [r.headers.get("Location", "") for r in response.history]
+    if response.is_redirect:
+        locations.append(response.headers.get("Location", ""))
+    if response.history:
+        locations.append(response.url)
+    if any(LOGIN_URL_RE.search(location) for location in locations if location):
+        return True
+    endpoint = response.url.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+    return endpoint in JSON_ENDPOINTS and "html" in response.headers.get("Content-Type", "").lower()
+
+def _usable_credentials(new_config: dict | None) -> bool:
+    """New credentials must be complete, differ from the ones that just expired, and pass a probe."""
+    if not new_config:
+        return False
+    if not all(new_config.get(key) and new_config[key] != "None" for key in ('COOKIE', 'TOKEN', 'SESSION_ID')):
+        return False
+    if new_config.get('COOKIE') == config.get('COOKIE') and new_config.get('TOKEN') == config.get('TOKEN'):
+        return False
+    return credentials.probe_credentials(new_config, base_url=BASE_URL)
+
+def refresh_session(seen_generation: int) -> bool:
+    """Replaces expired credentials with the first usable ones from REFRESH_SOURCES.
+       Single flight: if another thread already refreshed since seen_generation, returns at once.
+       Within REFRESH_RETRY_AFTER of a refresh where no source worked, returns False without trying.
+       Returns True when the caller should retry with the current credentials.
+    """
+    global CREDENTIALS_GENERATION
+    global _REFRESH_FAILED_AT
+    with SESSION_REFRESH_LOCK:
+        if CREDENTIALS_GENERATION != seen_generation:
+            return True
+        if _REFRESH_FAILED_AT is not None and time.monotonic() - _REFRESH_FAILED_AT < REFRESH_RETRY_AFTER:
+            return False
+        SESSION_READY.clear()
+        try:
+            start = time.perf_counter()
+            for name, source in REFRESH_SOURCES:
+                print(f"[SESSION] Trying {name} for fresh credentials...")
+                try:
+                    new_config = source()
+                except Exception as e:
+                    print(f"[SESSION] {name} failed: {e}")
+                    continue
+                if not _usable_credentials(new_config):
+                    print(f"[SESSION] {name} had no new working credentials.")
+                    continue
+                apply_credentials(new_config)
+                # Cached models sit in the old session's cart and their bodies carry the old uniqueSessionId
+                with MODEL_CACHE_LOCK:
+                    MODEL_CACHE.clear()
+                CREDENTIALS_GENERATION += 1
+                _REFRESH_FAILED_AT = None
+                log(f"[SESSION] Credentials refreshed from {name} in {time.perf_counter() - start:.1f}s")
+                return True
+            _REFRESH_FAILED_AT = time.monotonic()
+            log(f"[SESSION] Session expired and no refresh source produced working credentials "
+                f"(trying again in {REFRESH_RETRY_AFTER:.0f}s).")
+            return False
+        finally:
+            SESSION_READY.set()
+
+def with_session_refresh(label: str, fn, *args, **kwargs):
+    """Calls fn; if the session expired, pauses until credentials are refreshed and calls it again.
+       Re-raises SessionExpired once MAX_SESSION_REFRESHES is used up or no refresh worked.
+    """
+    attempt = 0
+    while True:
+        generation = CREDENTIALS_GENERATION
+        try:
+            return fn(*args, **kwargs)
+        except SessionExpired as e:
+            log(f"[SESSION] {label}: session expired ({e}), pausing for fresh credentials")
+            if attempt >= MAX_SESSION_REFRESHES or not refresh_session(generation):
+                raise
+            attempt += 1
+            log(f"[SESSION] {label}: resuming")
+
+def build_refresh_sources(store_path: str, profile: str, pool_url: str = "", debug_port: str = "",
+                          term_name: str = "", fetch_args: str = "") -> list:
+    """Refresh sources in order of cost: the credential store (another process may have refreshed it),
+       a running browser_pool.py, a live debug-port browser, then a full fetch_srs_config.py run.
+    """
+    sources = [("credential store", lambda: credentials.load_credentials(profile, store_path))]
+
+    if pool_url:
+        def _from_pool():
+            import browser_pool
+            name = "" if profile == credentials.DEFAULT_PROFILE else profile
+            return browser_pool.fetch_from_pool(pool_url, name)
+        sources.append(("browser pool", _from_pool))
+
+    if debug_port:
+        def _from_debug_port():
+            import fetch_srs_config
+            extracted = fetch_srs_config.extract_from_debug_port(debug_port, term_name)
+            return credentials.save_credentials(extracted["cookie"], extracted["token"], extracted["session_id"],
+                                                term=term_name, profile=profile, path=store_path,
+                                                source="session_refresh")
+        sources.append((f"Edge on debug port {debug_port}", _from_debug_port))
+
+    if fetch_args:
+        def _from_fetch():
+            # A separate process: the fetch watchdog exits its whole process on timeout
+            script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fetch_srs_config.py")
+            cmd = [sys.executable, script, *shlex.split(fetch_args), "--no-cache",
+                   "--output", store_path, "--credentials-profile", profile]
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, timeout=REFRESH_FETCH_TIMEOUT)
+            return credentials.load_credentials(profile, store_path)
+        sources.append(("fetch_srs_config.py", _from_fetch))
+    return sources
+
+# ==========================================
+# SCHEDULER (fire at window open on the server's clock)
+# ==========================================
+DEFAULT_CLOCK_PROBES = 8
+DEFAULT_PREPARE_LEAD = 20.0
+
+def _probe_server_date(session: requests.Session) -> tuple[float, float, float]:
+    """Sends one lightweight HEAD request and returns (local_sent, local_received, server_date).
+       server_date is the second-resolution HTTP Date header as a Unix timestamp.
+    """
+    parsed = urlparse(BASE_URL)
+    probe_url = f"{parsed.scheme}://{parsed.netloc}/"
+    sent = time.time()
+    response = session.head(probe_url, allow_redirects=False, timeout=10)
+    received = time.time()
+    date_header = response.headers.get("Date")
+    if not date_header:
+        raise ValueError("server response has no Date header")
+    return sent, received, parsedate_to_datetime(date_header).timestamp()
+
+def estimate_clock_offset(session: requests.Session, probes: int = DEFAULT_CLOCK_PROBES) -> tuple[float, float]:
+    """Estimates server_time - local_time from HTTP Date headers.
+
+       The Date header only has one-second resolution, so each probe bounds the offset:
+       the server stamped it somewhere between our send and receive times, and its true
+       time was in [date, date + 1). Later probes are timed to land on the estimated
+       server second boundary, which roughly halves the interval each time (bisection),
+       until it is limited by the round-trip time.
+
+       Returns (offset_seconds, uncertainty_seconds).
+    """
+    low, high = -math.inf, math.inf
+    rtt = None
+    for i in range(max(1, probes)):
+        if i > 0:
+            # Aim the request's midpoint at the next server second under the current estimate
+            guess = (low + high) / 2
+            boundary = math.floor(time.time() + guess) + 1
+            send_at = boundary - guess - (rtt or 0) / 2
+            # Make sure there is time to get ready for the next boundary
+            if send_at - time.time() < 0.05:
+                send_at += 1
+            time.sleep(max(0.0, send_at - time.time()))
+        try:
+            sent, received, server_date = _probe_server_date(session)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Warning: Clock probe failed ({e}).")
+            continue
+        rtt = received - sent if rtt is None else min(rtt, received - sent)
+        low = max(low, server_date - received)
+        high = min(high, server_date + 1 - sent)
+        if low > high:
+            # Inconsistent probes (e.g. server clock jumped); start over from this one
+            low, high = server_date - received, server_date + 1 - sent
+
+    if math.isinf(low) or math.isinf(high):
+        raise RuntimeError("no clock probe succeeded")
+    return (low + high) / 2, (high - low) / 2
+
+def parse_fire_time(value: str) -> float:
+    """Parses an ISO time such as '2026-11-02T07:00:00' (local time unless it has an offset)."""
+    return datetime.fromisoformat(value).timestamp()
+
+def wait_until(local_target: float):
+    """Sleeps until local_target (Unix time), spinning for the last few milliseconds."""
+    while True:
+        remaining = local_target - time.time()
+        if remaining <= 0:
+            return
+        if remaining > 0.05:
+            time.sleep(remaining - 0.04)
+
+def prepare_and_wait(fire_at: float, session: requests.Session, pool_size: int,
+                     lead: float = DEFAULT_PREPARE_LEAD, probes: int = DEFAULT_CLOCK_PROBES,
+                     on_prepare=None) -> tuple[float, float]:
+    """Prepares ahead of fire_at (server clock) and returns at the firing moment.
+       on_prepare, if given, runs at the start of the prepare phase (e.g. prefetching models).
+       Returns the (offset, uncertainty) that was used.
+    """
+    # Sleep until the prepare phase, measured on the local clock with some slack
+    prepare_at = fire_at - lead
+    if prepare_at > time.time():
+        print(f"Waiting until {datetime.fromtimestamp(prepare_at)} to prepare...")
+        wait_until(prepare_at)
+
+    if on_prepare:
+        on_prepare()
+
+    print(f"Estimating server clock offset ({probes} probes)...")
+    offset, uncertainty = estimate_clock_offset(session, probes)
+    print(f"Server clock offset: {offset * 1000:+.1f} ms (± {uncertainty * 1000:.1f} ms)")
+
+    local_fire = fire_at - offset
+    if local_fire <= time.time():
+        print("[!] Registration open time has already passed on the server clock, firing now.")
+        return offset, uncertainty
+
+    # Keep-alive connections can idle out during the wait, so re-open them just before firing
+    rewarm_at = local_fire - 1.0
+    if rewarm_at > time.time():
+        wait_until(rewarm_at)
+    warm_session(session, pool_size)
+
+    wait_until(local_fire)
+    return offset, uncertainty
+
+def report_fire_accuracy(fire_at: float, offset: float, uncertainty: float):
+    """Logs how far the first request was from the target time, on the server's clock."""
+    if FIRST_REQUEST_AT is None:
+        print("No registration request was sent; nothing to report.")
+        return
+    error_ms = (FIRST_REQUEST_AT + offset - fire_at) * 1000
+    log(f"[SCHEDULE] First request fired {error_ms:+.1f} ms from target (clock estimate ± {uncertainty * 1000:.1f} ms)")
+
+# ==========================================
+# REGISTRATION
+# ==========================================
+DEFAULT_MAX_INFLIGHT = 4
+
+# Caps how many registration requests are on the wire at once (set in test_add_course)
+INFLIGHT_LIMIT = None
+
+def add_to_cart(crn: str, term: str):
+    """Step 1: adds a CRN to the cart. Returns (model, course_title), or None if unusable."""
+    add_url = f"{BASE_URL}/classRegistration/addCRNRegistrationItems"
+    payload = {
+        'crnList': crn,
+        'term': term
+    }
+
+    print(f"POST URL: {add_url}")
+    print(f"Payload: {payload}")
+
+    response = _post(add_url, headers=HEADERS, data=payload)
+
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        print(f"\nCRITICAL ERROR: Server did not return JSON for CRN {crn}.")
+        print(f"Status Code: {response.status_code}")
+        print(f"Response Content (First 500 chars):\n{response.text[:500]}")
+        log(f"[ERROR] CRN {crn}: Server did not return JSON")
+        return None
+
+    response.raise_for_status()
+
+    items = data.get('aaData', [])
+    if not items:
+        msg = f"No data returned in aaData for CRN {crn}."
+        print(json.dumps(data, indent=2))
+        log(msg)
+        return None
+
+    item = items[0]
+
+    if not item.get('success'):
+        msg = f"CRN {crn}: {item.get('message', 'Unknown error')}"
+        log(msg)
+        print(f"[!] {msg}")
+        if not item.get('model'):
+            return None
+
+    model = item.get('model')
+
+    if not model:
+        log(f"CRN {crn}: Model missing, skipping")
+        return None
+
+    course_title = model.get('courseTitle', 'Unknown')
+    log(f"Got model: {course_title} ({crn})")
+    return model, course_title
+
+def choose_action(model: dict, crn: str) -> str:
+    """Picks the "Web Registered" action code from the model, defaulting to 'RW'."""
+    valid_actions = model.get('registrationActions', [])
+    target_action_code = None
+
+    print(f"Available Actions for CRN {crn}:")
+    for action in valid_actions:
+        code = action.get('courseRegistrationStatus')
+        desc = action.get('description')
+        print(f" - {desc} (Code: {code})")
+
+        if desc and ("Web Registered" in desc or "Register" in desc):
+            target_action_code = code
+
+    if not target_action_code:
+        target_action_code = "RW"
+        print(f"[!] Could not auto-detect register action for CRN {crn}, defaulting to 'RW'")
+    return target_action_code
+
+def build_batch_body(models: list[dict]) -> bytes:
+    """Serializes a submitRegistration/batch payload for the given models."""
+    batch_payload = {
+        "uniqueSessionId": UNIQUE_SESSION_ID,
+        "create": [],
+        "update": models,
+        "destroy": []
+    }
+    return json.dumps(batch_payload).encode("utf-8")
+
+def submit_body(body: bytes, verbose: bool = False) -> dict:
+    """POSTs an already serialized batch payload and returns the JSON response."""
+    submit_url = f"{BASE_URL}/classRegistration/submitRegistration/batch"
+
+    batch_headers = HEADERS.copy()
+    batch_headers['Content-Type'] = 'application/json'
+
+    submit_resp = _post(submit_url, headers=batch_headers, data=body)
+    submit_resp.raise_for_status()
+
+    result_data = submit_resp.json()
+
+    # Debug: print full response when --verbose is set
+    if verbose:
+        print("\n[DEBUG] Full batch response:")
+        print(json.dumps(result_data, indent=2))
+    return result_data
+
+def submit_models(models: list[dict], verbose: bool = False) -> dict:
+    """Step 2: submits the models in one submitRegistration/batch call and returns the JSON."""
+    return submit_body(build_batch_body(models), verbose=verbose)
 
-BASE_URL = "https://srs-owlexpress.kennesaw.edu/StudentRegistrationSsb/ssb"
+# Update-item statusDescription values Banner uses for a section that is now on the schedule
+REGISTERED_STATUS_RE = re.compile(r"^\s*(web\s+)?registered\b", re.IGNORECASE)
 
-def test_add_course():
+def item_registered(update_item: dict) -> bool | None:
+    """Whether a batch update item's own status shows the CRN registered, or None if it has none."""
+    description = update_item.get('statusDescription')
+    if not description:
+        return None
+    return bool(REGISTERED_STATUS_RE.search(description))
+
+def report_submit_result(result_data: dict, crn: str, course_title: str, batched: bool = False) -> bool:
+    """Logs the outcome for one CRN of a batch response. Returns True if it registered.
+       When several CRNs shared the batch (batched=True) the global success flag covers all
+       of them, so this CRN also needs its own update item with no crnErrors or error messages,
+       and that item's statusDescription must show it registered (without one, the global
+       flag decides).
+    """
+    success = result_data.get('success', False)
+    message = result_data.get('message', 'No message provided')
+    print(f"Global Message: {message}")
+    print(f"Success Flag: {success}")
+
+    # Check for CRN specific errors - only look at the item matching our CRN
+    updates = result_data.get('data', {}).get('update', [])
+    found_errors = False
+    found_item = False
+    item_status = None
+
+    for update_item in updates:
+        item_crn = update_item.get('courseReferenceNumber', '')
+        # Only process the update_item for the CRN we just submitted
+        if str(item_crn) != str(crn):
+            continue
+        found_item = True
+        item_status = item_registered(update_item)
+        if item_status is False:
+            found_errors = True
+            print(f"[!] {course_title} ({crn}): {update_item.get('statusDescription')}")
+
+        crn_errors = update_item.get('crnErrors', [])
+        has_crn_errors = bool(crn_errors)
+
+        # Always log/print crnErrors if present
+        if has_crn_errors:
+            found_errors = True
+            for err in crn_errors:
+                err_msg = f"{crn}: {err.get('message')}"
+                print(f"[!] {err_msg}")
+                log(f"[ERROR] {err_msg}")
+
+        # Process messages: if there are crnErrors, do NOT print/log success messages
+        msgs = update_item.get('messages', [])
+        for msg in msgs:
+            msg_type = msg.get('type')
+            msg_text = msg.get('message')
+            if msg_type == 'error':
+                found_errors = True
+                print(f"[!] {course_title} ({crn}): {msg_text}")
+                log(f"[ERROR] {crn}: {msg_text}")
+            elif msg_type == 'success':
+                if has_crn_errors:
+                    # Skip success messages when crnErrors exist (avoid misleading output)
+                    continue
+                print(f"[+] {course_title} ({crn}): {msg_text}")
+                log(f"[SUCCESS] {course_title} ({crn}): {msg_text}")
+
+    if batched:
+        success = found_item and (item_status if item_status is not None else success)
+    if not found_errors and success:
+        print(f"\n[SUCCESS] CRN {crn} registered successfully!")
+        return True
+    print(f"\n[FAILED] CRN {crn} registration failed. Trying next CRN...")
+    return False
+
+# crnErrors/messages meaning the CRN is already on the schedule (e.g. online/TBA sections the
+# pre-flight can't see)
+ALREADY_REGISTERED_RE = re.compile(r"already\s+registered|dupl(icate)?\s+crn", re.IGNORECASE)
+
+def submit_says_held(result_data: dict, crn: str) -> bool:
+    """True if the submit rejected this CRN because the student already holds it."""
+    for item in result_data.get('data', {}).get('update', []):
+        if str(item.get('courseReferenceNumber', '')) != str(crn):
+            continue
+        texts = [err.get('message') or "" for err in item.get('crnErrors', [])]
+        texts += [msg.get('message') or "" for msg in item.get('messages', []) if msg.get('type') == 'error']
+        if any(ALREADY_REGISTERED_RE.search(text) for text in texts):
+            return True
+    return False
+
+def note_held(result: dict, result_data: dict, term: str):
+    """Marks a failed result as already held when the submit said so, and adds the CRN to the
+       pre-flight's cached schedule so its group's alternates are skipped.
+    """
+    if result["success"] or not submit_says_held(result_data, result["crn"]):
+        return
+    result["held"] = True
+    log(f"[PRE-FLIGHT] CRN {result['crn']} is already on the schedule; skipping its alternates")
+    with REGISTERED_CRNS_LOCK:
+        if term in REGISTERED_CRNS:
+            REGISTERED_CRNS[term].add(result["crn"])
+
+# ==========================================
+# MODEL CACHE (prepare phase)
+# ==========================================
+DEFAULT_MODEL_MAX_AGE = 300.0
+
+# CRN -> {"model", "title", "action", "body", "fetched_at"}, filled by prefetch_models
+MODEL_CACHE = {}
+MODEL_CACHE_LOCK = threading.Lock()
+MODEL_MAX_AGE = DEFAULT_MODEL_MAX_AGE
+
+def prefetch_model(crn: str, term: str) -> bool:
+    """Fetches one CRN's model ahead of time and caches it with its action and submit body.
+       Returns False when the server doesn't hand out a model yet (e.g. window not open).
+    """
+    try:
+        added = with_session_refresh(f"Prefetch {crn}", add_to_cart, crn, term)
+    except requests.exceptions.RequestException as e:
+        print(f"Prefetch failed for CRN {crn}: {e}")
+        return False
+    if not added:
+        return False
+    model, course_title = added
+    action = choose_action(model, crn)
+    model['selectedAction'] = action
+    entry = {
+        "model": model,
+        "title": course_title,
+        "action": action,
+        "body": build_batch_body([model]),
+        "fetched_at": time.time(),
+    }
+    with MODEL_CACHE_LOCK:
+        MODEL_CACHE[crn] = entry
+    return True
+
+def prefetch_models(crn_list: list[str], term: str) -> int:
+    """Prepare phase: caches models for the given CRNs (group heads) in parallel.
+       Returns how many were cached.
+    """
+    if not crn_list:
+        return 0
+    with ThreadPoolExecutor(max_workers=len(crn_list), thread_name_prefix="prefetch") as executor:
+        cached = list(executor.map(lambda crn: prefetch_model(crn, term), crn_list))
+    count = sum(cached)
+    log(f"[PREPARE] Cached {count}/{len(crn_list)} registration model(s).")
+    return count
+
+def get_cached_model(crn: str) -> dict | None:
+    """Returns the cached entry for a CRN if it is still fresh, dropping it otherwise."""
+    with MODEL_CACHE_LOCK:
+        entry = MODEL_CACHE.get(crn)
+        if entry and time.time() - entry["fetched_at"] > MODEL_MAX_AGE:
+            print(f"Cached model for CRN {crn} is stale, using the two-step flow.")
+            del MODEL_CACHE[crn]
+            entry = None
+    return entry
+
+def cached_submit_rejected(result_data: dict, crn: str) -> bool:
+    """True when the server ignored a cached model (no update item came back for the CRN)."""
+    updates = result_data.get('data', {}).get('update', [])
+    return not any(str(item.get('courseReferenceNumber', '')) == str(crn) for item in updates)
+
+def _register_crn(crn: str, term: str, verbose: bool = False) -> dict:
+    """Adds one CRN to the cart and immediately submits it.
+       With a fresh cached model only the pre-serialized submit is sent; if the server
+       rejects it, this falls back to the two-step add → submit flow.
+       Returns a result dict: {"crn", "success", "title"}, with "held" set when the server
+       said the CRN is already registered. Raises SessionExpired.
+    """
+    result = {"crn": crn, "success": False, "title": None}
+    print(f"\n{'='*50}")
+    print(f"Processing CRN {crn}")
+    print(f"{'='*50}")
+    log(f"\n--- Processing CRN {crn} ---")
+
+    try:
+        cached = get_cached_model(crn)
+        if cached:
+            result["title"] = cached["title"]
+            print(f"\n--- Submitting CRN {crn} (cached model) ---")
+            log(f"Submitting {cached['title']} ({crn}) from cached model...")
+            try:
+                result_data = submit_body(cached["body"], verbose=verbose)
+            except (requests.exceptions.HTTPError, json.JSONDecodeError) as e:
+                print(f"[!] Cached submit failed for CRN {crn} ({e}).")
+                result_data = None
+            if result_data is not None and not cached_submit_rejected(result_data, crn):
+                result["success"] = report_submit_result(result_data, crn, cached["title"])
+                note_held(result, result_data, term)
+                return result
+            log(f"CRN {crn}: Cached model rejected, falling back to add → submit")
+            with MODEL_CACHE_LOCK:
+                MODEL_CACHE.pop(crn, None)
+
+        added = add_to_cart(crn, term)
+        if not added:
+            return result
+        model, course_title = added
+        result["title"] = course_title
+
+        model['selectedAction'] = choose_action(model, crn)
+
+        # Immediately batch submit this single CRN
+        print(f"\n--- Submitting CRN {crn} ---")
+        log(f"Submitting {course_title} ({crn})...")
+        result_data = submit_models([model], verbose=verbose)
+        result["success"] = report_submit_result(result_data, crn, course_title)
+        note_held(result, result_data, term)
+
+    except SessionExpired:
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"Request failed for CRN {crn}: {e}")
+        log(f"[ERROR] CRN {crn}: Request failed - {e}")
+    except Exception as e:
+        print(f"An error occurred for CRN {crn}: {e}")
+        log(f"[ERROR] CRN {crn}: {e}")
+    return result
+
+def register_crn(crn: str, term: str, verbose: bool = False) -> dict:
+    """Registers one CRN, pausing it and starting over with fresh credentials if the session
+       expires partway. Returns a result dict: {"crn", "success", "title"}.
+    """
+    try:
+        return with_session_refresh(f"CRN {crn}", _register_crn, crn, term, verbose=verbose)
+    except SessionExpired as e:
+        log(f"[ERROR] CRN {crn}: Session expired - {e}")
+        return {"crn": crn, "success": False, "title": None}
+
+def run_group(group: list[str], term: str, verbose: bool = False) -> list[dict]:
+    """Tries alternates of one priority group in order, stopping at the first success.
+       Alternates stay sequential so they never collide with a "duplicate section" error.
+    """
+    results = []
+    for crn in group:
+        result = register_crn(crn, term, verbose=verbose)
+        results.append(result)
+        if result["success"] or result.get("held"):
+            break
+    return results
+
+def run_groups(groups: list[list[str]], term: str, verbose: bool = False) -> list[dict]:
+    """Runs priority groups in parallel (one worker per group) and returns every CRN result.
+       The number of requests actually on the wire is capped by INFLIGHT_LIMIT.
+    """
+    if len(groups) == 1:
+        return run_group(groups[0], term, verbose=verbose)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="crn-group") as executor:
+        futures = [executor.submit(run_group, group, term, verbose) for group in groups]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+def run_batched(groups: list[list[str]], term: str, verbose: bool = False) -> list[dict]:
+    """Registers the current head of every priority group with a single
+       submitRegistration/batch call per round (e.g. lecture + lab, or unrelated courses).
+
+       Heads are added to the cart in parallel (or taken from the prefetch cache), then
+       submitted together and parsed per CRN. Any CRN that fails inside the batch is
+       retried on its own; if that fails too, its group moves on to the next alternate
+       in the following round.
+    """
+    results = []
+    cursors = [0] * len(groups)
+    done = [False] * len(groups)
+    round_no = 0
+
+    while True:
+        active = [i for i, group in enumerate(groups) if not done[i] and cursors[i] < len(group)]
+        if not active:
+            break
+        round_no += 1
+        heads = {i: groups[i][cursors[i]] for i in active}
+        log(f"\n--- Batch round {round_no}: CRNs {', '.join(heads.values())} ---")
+
+        def _prepare(crn):
+            cached = get_cached_model(crn)
+            if cached:
+                return cached["model"], cached["title"]
+            try:
+                added = with_session_refresh(f"CRN {crn}", add_to_cart, crn, term)
+            except requests.exceptions.RequestException as e:
+                print(f"Request failed for CRN {crn}: {e}")
+                log(f"[ERROR] CRN {crn}: Request failed - {e}")
+                return None
+            if not added:
+                return None
+            model, course_title = added
+            model['selectedAction'] = choose_action(model, crn)
+            return model, course_title
+
+        with ThreadPoolExecutor(max_workers=len(heads), thread_name_prefix="batch-add") as executor:
+            prepared = dict(zip(heads.keys(), executor.map(_prepare, heads.values())))
+
+        ready = {i: entry for i, entry in prepared.items() if entry}
+        outcomes = {}
+        for i in active:
+            if i not in ready:
+                outcomes[i] = {"crn": heads[i], "success": False, "title": None}
+
+        if ready:
+            models = [model for model, _ in ready.values()]
+            print(f"\n--- Submitting {len(models)} CRN(s) in one batch ---")
+            try:
+                result_data = submit_models(models, verbose=verbose)
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                print(f"Batch submit failed: {e}")
+                log(f"[ERROR] Batch submit failed - {e}")
+                result_data = None
+
+            retry = []
+            for i, (model, course_title) in ready.items():
+                crn = heads[i]
+                success = False
+                if result_data is not None:
+                    success = report_submit_result(result_data, crn, course_title, batched=len(ready) > 1)
+                outcome = {"crn": crn, "success": success, "title": course_title}
+                if result_data is not None:
+                    note_held(outcome, result_data, term)
+                if success or outcome.get("held"):
+                    outcomes[i] = outcome
+                else:
+                    log(f"CRN {crn}: retrying individually")
+                    with MODEL_CACHE_LOCK:
+                        MODEL_CACHE.pop(crn, None)
+                    retry.append(i)
+
+            # Retry failed items on their own through the normal two-step flow, in parallel
+            if retry:
+                with ThreadPoolExecutor(max_workers=len(retry), thread_name_prefix="batch-retry") as executor:
+                    retried = executor.map(lambda i: register_crn(heads[i], term, verbose=verbose), retry)
+                    outcomes.update(zip(retry, retried))
+
+        for i in active:
+            results.append(outcomes[i])
+            if outcomes[i]["success"] or outcomes[i].get("held"):
+                done[i] = True
+            else:
+                cursors[i] += 1
+
+    return results
+
+# ==========================================
+# SEAT AVAILABILITY (watch mode)
+# ==========================================
+SEATS_AVAILABLE_RE = re.compile(r"Seats Available:\s*</span>\s*<span[^>]*>\s*(-?\d+)", re.IGNORECASE)
+
+def fetch_seat_count(crn: str, term: str) -> int | None:
+    """Returns open seats for one CRN from getEnrollmentInfo, or None if it can't be parsed.
+       Raises for HTTP errors (429/5xx) so the watcher can back off.
+    """
+    url = f"{BASE_URL}/searchResults/getEnrollmentInfo"
+    response = _post(url, headers=HEADERS, data={'term': term, 'courseReferenceNumber': crn})
+    response.raise_for_status()
+    match = SEATS_AVAILABLE_RE.search(response.text)
+    if not match:
+        return None
+    return int(match.group(1))
+
+def fetch_seat_counts(crns: list[str], term: str) -> dict:
+    """Polls seat counts for many CRNs at once over the shared pool.
+       Returns {crn: seats or None}; raises if every request failed.
+    """
+    if not crns:
+        return {}
+    counts = {}
+    errors = []
+
+    def _one(crn):
+        try:
+            counts[crn] = with_session_refresh(f"Seat poll {crn}", fetch_seat_count, crn, term)
+        except requests.exceptions.RequestException as e:
+            counts[crn] = None
+            errors.append(e)
+
+    with ThreadPoolExecutor(max_workers=len(crns), thread_name_prefix="seat-poll") as executor:
+        list(executor.map(_one, crns))
+    if len(errors) == len(crns):
+        raise errors[0]
+    return counts
+
+# ==========================================
+# PRE-FLIGHT (current schedule)
+# ==========================================
+# term -> CRNs already on the student's schedule, fetched once per process
+REGISTERED_CRNS = {}
+REGISTERED_CRNS_LOCK = threading.Lock()
+
+def fetch_registered_crns(term: str) -> set[str]:
+    """Returns the CRNs the student already holds for the term (getRegistrationEvents).
+       The first call asks the server; later calls reuse the answer.
+       getRegistrationEvents feeds the schedule calendar, so sections without meeting times
+       (online or TBA) are not listed. Those are caught at submit instead: an "already
+       registered" error adds the CRN here (note_held) and its group's alternates are skipped.
+    """
+    with REGISTERED_CRNS_LOCK:
+        if term in REGISTERED_CRNS:
+            return REGISTERED_CRNS[term]
+        response = _get(f"{BASE_URL}/classRegistration/getRegistrationEvents", {"termFilter": term})
+        response.raise_for_status()
+        events = response.json()
+        held = set()
+        for event in events if isinstance(events, list) else []:
+            crn = event.get("crn") or event.get("courseReferenceNumber")
+            if crn and str(event.get("term", term)) == str(term):
+                held.add(str(crn))
+        REGISTERED_CRNS[term] = held
+        return held
+
+def skip_registered(groups: list[list[str]], held: set[str]) -> list[list[str]]:
+    """Drops every group that already has one of its CRNs on the schedule: the course
+       (or one of its alternates) is held, so none of them should be submitted again.
+    """
+    remaining = []
+    for group in groups:
+        taken = [crn for crn in group if crn in held]
+        if taken:
+            log(f"[PRE-FLIGHT] Already registered for {', '.join(taken)}; skipping {', '.join(group)}")
+        else:
+            remaining.append(group)
+    return remaining
+
+# ==========================================
+# SEAT INDEX (paginated class search)
+# ==========================================
+def search_results_page(params: dict) -> dict:
+    """GETs one page of searchResults/searchResults through the shared session."""
+    response = _get(f"{BASE_URL}/searchResults/searchResults", {**params, "uniqueSessionId": UNIQUE_SESSION_ID})
+    response.raise_for_status()
+    return response.json()
+
+def reset_search_form():
+    """Clears the session's previous class search so the next one starts from page one."""
+    _post(f"{BASE_URL}/classSearch/resetDataForm", headers=HEADERS).raise_for_status()
+
+def build_seat_index(term: str) -> seat_index.SeatIndex | None:
+    """Pulls the term's class search into a SeatIndex. Returns None if the search failed."""
+    index = seat_index.SeatIndex(term, search_results_page, reset=reset_search_form)
+    try:
+        with_session_refresh("Seat index", index.build)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Warning: Could not build the seat index ({e}); trying every CRN.")
+        return None
+    return index
+
+# CRNs the seat index was already reported not to list (logged once each)
+UNINDEXED_CRNS = set()
+
+def index_seat_counts(index: seat_index.SeatIndex, crns: list[str], term: str) -> dict:
+    """Watch-mode poll: seat counts from the index after refreshing the CRNs' subjects.
+       CRNs the term search didn't list are polled with getEnrollmentInfo instead, so they
+       aren't left at None (never tried) for the whole watch.
+    """
+    counts = with_session_refresh("Seat index", index.seat_counts, crns, force=True)
+    unknown = [crn for crn, seats in counts.items() if seats is None]
+    if not unknown:
+        return counts
+    new = [crn for crn in unknown if crn not in UNINDEXED_CRNS]
+    if new:
+        UNINDEXED_CRNS.update(new)
+        log(f"[INDEX] Not in the term's class search, polling getEnrollmentInfo: {', '.join(new)}")
+    try:
+        counts.update(fetch_seat_counts(unknown, term))
+    except requests.exceptions.RequestException as e:
+        print(f"[INDEX] getEnrollmentInfo poll failed for {', '.join(unknown)}: {e}")
+    return counts
+
+def skip_full_sections(index: seat_index.SeatIndex, groups: list[list[str]]) -> list[list[str]]:
+    """Drops CRNs the index lists as full, keeping each group's priority order.
+       Groups left empty are dropped; CRNs the index doesn't know are kept.
+    """
+    filtered = []
+    for group in groups:
+        keep, skipped = index.without_full(group)
+        if skipped:
+            log(f"[INDEX] Skipping full section(s): {', '.join(skipped)}")
+        if keep:
+            filtered.append(keep)
+    return filtered
+
+def write_results_json(path: str, term: str, results: list[dict]):
+    """Writes the per-CRN results in a machine-readable form."""
+    summary = {
+        "term": term,
+        "success": any(r["success"] for r in results),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+def parse_groups(spec: str) -> list[list[str]]:
+    """Parses '11038,10961;12000' into [['11038', '10961'], ['12000']].
+       Groups are separated by ';', alternates inside a group by ',' in priority order.
+    """
+    groups = []
+    for chunk in spec.split(";"):
+        group = [c.strip() for c in chunk.split(",") if c.strip()]
+        if group:
+            groups.append(group)
+    return groups
+
+def test_add_course(argv: list[str] | None = None, credentials_config: dict | None = None) -> bool:
+    """Runs registration with the given CLI arguments (sys.argv when None).
+       credentials_config (COOKIE, TOKEN, SESSION_ID keys) skips reading the credential store.
+       Returns True if at least one CRN registered.
+    """
     # Parse arguments
     parser = argparse.ArgumentParser(description="Course Registration Bot")
     parser.add_argument("--crn", help="Single CRN to register (or use --crns for multiple)")
     parser.add_argument("--crns", help="Comma-separated list of CRNs (e.g. 10961,11038)")
+    parser.add_argument("--groups", help="Priority groups run in parallel: ';' between groups, ',' between alternates (e.g. '11038,10961;12000')")
+    parser.add_argument("--concurrent", action="store_true", help="Treat every CRN in the list as independent and register them in parallel")
+    parser.add_argument("--batch", action="store_true", help="Submit the current CRN of every group (or every CRN with --concurrent) in one submitRegistration/batch call; failures are retried individually")
+    parser.add_argument("--max-inflight", type=int, help=f"Max registration requests in flight at once (default {DEFAULT_MAX_INFLIGHT}, or max_inflight in bot_config.json)")
+    parser.add_argument("--watch", action="store_true", help="Keep running: poll seat availability and register each group as soon as a seat opens")
+    parser.add_argument("--no-preflight", action="store_true", help="Don't check the current schedule first (by default CRNs already registered, and groups whose alternate is, are skipped; sections without meeting times, e.g. online/TBA, are only detected when submit reports them as already registered)")
+    parser.add_argument("--seat-index", action="store_true", help="Pull the term's class search up front and skip CRNs that are already full; with --watch, poll seats from it one subject at a time instead of per CRN")
+    parser.add_argument("--poll-min", type=float, default=seat_watch.DEFAULT_MIN_INTERVAL, help=f"Fastest seat poll interval in seconds for --watch (default {seat_watch.DEFAULT_MIN_INTERVAL:.0f})")
+    parser.add_argument("--poll-max", type=float, default=seat_watch.DEFAULT_MAX_INTERVAL, help=f"Slowest seat poll interval in seconds for --watch (default {seat_watch.DEFAULT_MAX_INTERVAL:.0f})")
     parser.add_argument("--term", help="Term code (e.g. 202601)")
-    parser.add_argument("--webhook", help="Override Discord webhook URL (otherwise uses bot_config.json)")
-    parser.add_argument("--discord-user", help="Override Discord user ID to ping (otherwise uses bot_config.json)")
+    parser.add_argument("--base-url", help="Override the SRS base URL, e.g. a local mock_srs_server.py (otherwise SRS_BASE_URL or the real SRS)")
+    parser.add_argument("--webhook", help="Override Discord webhook URL (otherwise uses bot_config.json; '' disables it)")
+    parser.add_argument("--discord-user", help="Override Discord user ID to ping (otherwise uses bot_config.json; '' disables the ping)")
     parser.add_argument("--verbose", action="store_true", help="Print full batch response JSON for debugging")
-    args = parser.parse_args()
+    parser.add_argument("--results-json", help="Write per-CRN results to this JSON file (used by orchestrator.py)")
+    parser.add_argument("--pool-size", type=int, help=f"Keep-alive connections to open before the first CRN (default {DEFAULT_POOL_SIZE}, or pool_size in bot_config.json)")
+    parser.add_argument("--timing", action="store_true", help="Report fresh handshake time compared with pooled request time")
+    parser.add_argument("--at", help="Registration open time to fire at on the server's clock, ISO format (e.g. '2026-11-02T07:00:00', local time unless an offset is given)")
+    parser.add_argument("--prepare-lead", type=float, default=DEFAULT_PREPARE_LEAD, help=f"Seconds before --at to start preparing (default {DEFAULT_PREPARE_LEAD:.0f})")
+    parser.add_argument("--prefetch", action="store_true", help="Fetch and cache the first CRN of each group ahead of time so window open only submits (alternates use the normal add → submit flow; in the default sequential mode only the first CRN is prefetched)")
+    parser.add_argument("--model-max-age", type=float, default=DEFAULT_MODEL_MAX_AGE, help=f"Seconds a prefetched model stays usable (default {DEFAULT_MODEL_MAX_AGE:.0f})")
+    parser.add_argument("--clock-probes", type=int, default=DEFAULT_CLOCK_PROBES, help=f"Date-header probes used to estimate the server clock (default {DEFAULT_CLOCK_PROBES})")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT, help=f"Per-attempt read deadline in seconds for SRS requests (default {DEFAULT_REQUEST_TIMEOUT:.0f})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help=f"Retries with exponential backoff for connection errors and 5xx; submissions are only retried if never sent (default {DEFAULT_RETRIES})")
+    parser.add_argument("--hedge-after", type=float, help="Send a duplicate add-to-cart/seat request if no answer after this many seconds and use the first reply (default off; submissions are never hedged)")
+    parser.add_argument("--credentials", default=credentials.STORE_PATH, help=f"Credential store written by fetch_srs_config.py (default {credentials.STORE_PATH}; falls back to {credentials.CONFIG_DUMP_PATH})")
+    parser.add_argument("--credentials-profile", default=credentials.DEFAULT_PROFILE, help=f"Which stored profile to use (default {credentials.DEFAULT_PROFILE})")
+    parser.add_argument("--refresh-pool", help="If the session expires mid-run, ask this browser_pool.py (e.g. http://127.0.0.1:8765) for fresh credentials")
+    parser.add_argument("--refresh-debug-port", help="If the session expires mid-run, re-extract credentials from the Edge on this remote debugging port (window left open)")
+    parser.add_argument("--refresh-term-name", default="", help="Term name used to re-prime the workspace for --refresh-debug-port (e.g. 'Spring Semester 2026')")
+    parser.add_argument("--refresh-fetch", default="", help="If the session expires mid-run, run fetch_srs_config.py with these arguments (e.g. \"--term 'Spring Semester 2026' --debug-port 9222\")")
+    parser.add_argument("--session-refreshes", type=int, default=DEFAULT_SESSION_REFRESHES, help=f"How many times one CRN may wait for fresh credentials before giving up (default {DEFAULT_SESSION_REFRESHES}); the credential store is always checked first")
+    parser.add_argument("--record", help="Save every SRS request/response (cookies, token and session ID redacted) to this trace file (.jsonl, or .jsonl.gz)")
+    parser.add_argument("--replay", help="Answer SRS requests from a recorded trace instead of the server (offline; no credentials needed)")
+    parser.add_argument("--replay-latency", action="store_true", help="With --replay, wait the recorded response time before each answer")
+    parser.add_argument("--metrics-jsonl", help="Append per-request phase timings (DNS, connect, TLS, TTFB, total) to this JSON lines file")
+    parser.add_argument("--metrics-prom", help="Write per-endpoint latency histograms to this Prometheus textfile (node_exporter textfile collector)")
+    args = parser.parse_args(argv)
 
     global DISCORD_WEBHOOK_URL
     global DISCORD_USER_ID
+    global SESSION
+    global TIMING_ENABLED
+    global INFLIGHT_LIMIT
+    global MODEL_MAX_AGE
+    global FIRST_REQUEST_AT
+    global BASE_URL
+    global REQUEST_TIMEOUT
+    global MAX_RETRIES
+    global HEDGE_AFTER
+    global REFRESH_SOURCES
+    global MAX_SESSION_REFRESHES
+    if args.replay and not credentials_config:
+        # Traces are redacted, so any placeholder credentials will do offline
+        apply_credentials({})
+    else:
+        apply_credentials(credentials_config or load_config(args.credentials, args.credentials_profile))
     cfg = load_bot_config()
-    DISCORD_WEBHOOK_URL = args.webhook or _cfg_get(cfg, "webhook_url", "webhook", default="")
-    DISCORD_USER_ID = args.discord_user or _cfg_get(cfg, "discord_user_id", "discord_user", default="")
+    metrics.enable(args.metrics_jsonl, args.metrics_prom, source="registration")
+    REQUEST_TIMEOUT = args.request_timeout
+    MAX_RETRIES = max(0, args.retries)
+    HEDGE_AFTER = args.hedge_after if args.hedge_after and args.hedge_after > 0 else None
+    if args.base_url:
+        BASE_URL = args.base_url.rstrip("/")
+    MAX_SESSION_REFRESHES = max(0, args.session_refreshes)
+    if not args.replay:
+        REFRESH_SOURCES = build_refresh_sources(args.credentials, args.credentials_profile,
+                                                pool_url=args.refresh_pool, debug_port=args.refresh_debug_port,
+                                                term_name=args.refresh_term_name, fetch_args=args.refresh_fetch)
+    DISCORD_WEBHOOK_URL = args.webhook if args.webhook is not None else _cfg_get(cfg, "webhook_url", "webhook", default="")
+    DISCORD_USER_ID = args.discord_user if args.discord_user is not None else _cfg_get(cfg, "discord_user_id", "discord_user", default="")
+
+    fire_at = None
+    if args.at:
+        try:
+            fire_at = parse_fire_time(args.at)
+        except ValueError:
+            print(f"Invalid --at time: {args.at} (expected ISO format, e.g. 2026-11-02T07:00:00)")
+            return False
 
     # Build CRN list from args or config
     crn_list = []
-    if args.crns:
+    groups = []
+    if args.groups:
+        groups = parse_groups(args.groups)
+    elif args.crns:
         crn_list = [c.strip() for c in args.crns.split(",") if c.strip()]
     elif args.crn:
         crn_list = [args.crn.strip()]
     else:
         # Fall back to config
-        cfg_crns = cfg.get("crn_list", [])
-        if isinstance(cfg_crns, list):
-            crn_list = [str(c).strip() for c in cfg_crns if c]
+        cfg_groups = cfg.get("crn_groups", [])
+        if isinstance(cfg_groups, list) and cfg_groups:
+            groups = [[str(c).strip() for c in g if c] for g in cfg_groups if isinstance(g, list)]
+            groups = [g for g in groups if g]
+        else:
+            cfg_crns = cfg.get("crn_list", [])
+            if isinstance(cfg_crns, list):
+                crn_list = [str(c).strip() for c in cfg_crns if c]
+
+    if groups:
+        crn_list = [crn for group in groups for crn in group]
     
     term = args.term or _cfg_get(cfg, "term", default="")
 
@@ -156,175 +1386,160 @@ def test_add_course():
     
     if not crn_list or not term:
         print("CRN list and Term are required.")
-        print("Provide via --crn/--crns and --term, or configure in bot_config.json")
-        return
+        print("Provide via --crn/--crns/--groups and --term, or configure in bot_config.json")
+        return False
 
     log(f"[Step 2] Running Registration Script...\nTarget CRNs: {', '.join(crn_list)}, Term: {term}")
 
+    max_inflight = args.max_inflight or cfg.get("max_inflight") or DEFAULT_MAX_INFLIGHT
+    max_inflight = max(1, int(max_inflight))
+    INFLIGHT_LIMIT = threading.BoundedSemaphore(max_inflight)
+
+    # Open the keep-alive pool before the first CRN is sent
+    pool_size = args.pool_size or cfg.get("pool_size") or DEFAULT_POOL_SIZE
+    pool_size = max(1, int(pool_size))
+    TIMING_ENABLED = args.timing
+    handshake = None
+    if TIMING_ENABLED:
+        try:
+            handshake = measure_handshake(BASE_URL)
+        except OSError as e:
+            print(f"Warning: Could not measure handshake ({e}).")
+    SESSION = build_session(max(pool_size, max_inflight))
+    replay = None
+    recorder = None
+    if args.replay:
+        try:
+            replay = srs_trace.ReplayAdapter(srs_trace.load_trace(args.replay), latency=args.replay_latency)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not load trace {args.replay} ({e})")
+            return False
+        replay.mount(SESSION)
+        print(f"Replaying SRS responses from {args.replay}")
+    if args.record:
+        recorder = srs_trace.TraceRecorder(args.record)
+        recorder.attach(SESSION)
+    warm_times = warm_session(SESSION, pool_size)
+    print(f"Connection pool ready ({len(warm_times)}/{pool_size} connections warmed).")
+
+    if not args.no_preflight:
+        try:
+            held = with_session_refresh("Pre-flight", fetch_registered_crns, term)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Warning: Could not read the current schedule ({e}); submitting every CRN.")
+        else:
+            print(f"Current schedule for {term}: {', '.join(sorted(held)) or 'no CRNs'}")
+            if groups:
+                groups = skip_registered(groups, held)
+                crn_list = [crn for group in groups for crn in group]
+            else:
+                crn_list = [group[0] for group in skip_registered([[crn] for crn in crn_list], held)]
+            if not crn_list:
+                log("[PRE-FLIGHT] Every requested CRN is already registered; nothing to do.")
+                send_discord_buffer(ping_user=False)
+                return True
+
+    index = build_seat_index(term) if args.seat_index else None
+    if index and not args.watch:
+        # Watch mode keeps full sections: it is waiting for them to open
+        if groups:
+            groups = skip_full_sections(index, groups)
+            crn_list = [crn for group in groups for crn in group]
+        else:
+            kept = skip_full_sections(index, [crn_list])
+            crn_list = kept[0] if kept else []
+        if not crn_list:
+            log("[INDEX] Every requested section is full; nothing to register.")
+            send_discord_buffer(ping_user=False)
+            return False
+
+    MODEL_MAX_AGE = args.model_max_age
+    on_prepare = None
+    if args.prefetch:
+        # Only group heads go in the cart ahead of time; an alternate is added (two-step flow)
+        # only after the CRN before it failed, so alternates never hit "duplicate section"
+        if groups:
+            heads = [group[0] for group in groups]
+        elif args.concurrent or args.batch or args.watch:
+            heads = list(crn_list)
+        else:
+            heads = crn_list[:1]
+        on_prepare = partial(prefetch_models, heads, term)
+
+    clock = None
+    if fire_at is not None:
+        print(f"Scheduled to fire at {datetime.fromtimestamp(fire_at)} (server clock)")
+        try:
+            clock = prepare_and_wait(fire_at, SESSION, pool_size, lead=args.prepare_lead,
+                                     probes=args.clock_probes, on_prepare=on_prepare)
+        except RuntimeError as e:
+            print(f"Warning: Could not estimate server clock ({e}), firing on the local clock.")
+            wait_until(fire_at)
+            clock = (0.0, math.inf)
+    elif on_prepare:
+        on_prepare()
+    # Prefetch traffic doesn't count towards the firing time
+    FIRST_REQUEST_AT = None
+    hot_start = (len(REQUEST_TIMINGS), opened_connections(SESSION))
+
     # =============================================
-    # Process each CRN individually (add to cart → submit → next)
-    # This prevents "duplicate section" errors when trying alternate CRNs
+    # Default: process each CRN individually (add to cart → submit → next).
+    # This prevents "duplicate section" errors when trying alternate CRNs.
+    # With --groups/crn_groups or --concurrent, independent groups run in parallel.
     # =============================================
-    any_success = False
-    
-    for crn in crn_list:
-        print(f"\n{'='*50}")
-        print(f"Processing CRN {crn}")
-        print(f"{'='*50}")
-        log(f"\n--- Processing CRN {crn} ---")
-        
-        # Step 1: Add CRN to cart
-        add_url = f"{BASE_URL}/classRegistration/addCRNRegistrationItems"
-        payload = {
-            'crnList': crn,
-            'term': term
-        }
-        
-        print(f"POST URL: {add_url}")
-        print(f"Payload: {payload}")
-        
-        try:
-            response = requests.post(add_url, headers=HEADERS, data=payload)
-            
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                print(f"\nCRITICAL ERROR: Server did not return JSON for CRN {crn}.")
-                print(f"Status Code: {response.status_code}")
-                print(f"Response Content (First 500 chars):\n{response.text[:500]}")
-                log(f"[ERROR] CRN {crn}: Server did not return JSON")
-                continue
+    if args.watch:
+        def _notify(result):
+            # Long-running mode: report each registration right away
+            send_discord_buffer(ping_user=True)
 
-            response.raise_for_status()
-            
-            items = data.get('aaData', [])
-            if not items:
-                msg = f"No data returned in aaData for CRN {crn}."
-                print(json.dumps(data, indent=2))
-                log(msg)
-                continue
+        watch_groups = groups or [[crn] for crn in crn_list]
+        results = seat_watch.watch_seats(
+            watch_groups,
+            poll=(lambda crns: index_seat_counts(index, crns, term)) if index
+                 else (lambda crns: fetch_seat_counts(crns, term)),
+            register=lambda crn: register_crn(crn, term, verbose=args.verbose),
+            min_interval=args.poll_min,
+            max_interval=args.poll_max,
+            keepalive=lambda: warm_session(SESSION, pool_size),
+            on_registered=_notify,
+        )
+    elif args.batch:
+        batch_groups = groups or [[crn] for crn in crn_list]
+        print(f"Batching {len(batch_groups)} group(s) per submitRegistration/batch call")
+        results = run_batched(batch_groups, term, verbose=args.verbose)
+    elif groups:
+        print(f"Running {len(groups)} priority group(s) in parallel (max {max_inflight} in flight): {groups}")
+        results = run_groups(groups, term, verbose=args.verbose)
+    elif args.concurrent:
+        print(f"Running {len(crn_list)} CRN(s) in parallel (max {max_inflight} in flight)")
+        results = run_groups([[crn] for crn in crn_list], term, verbose=args.verbose)
+    else:
+        results = [register_crn(crn, term, verbose=args.verbose) for crn in crn_list]
 
-            item = items[0]
-            
-            if not item.get('success'):
-                msg = f"CRN {crn}: {item.get('message', 'Unknown error')}"
-                log(msg)
-                print(f"[!] {msg}")
-                if not item.get('model'):
-                    continue
+    any_success = any(r["success"] for r in results)
+    with REGISTERED_CRNS_LOCK:
+        # Keep the cached schedule current for later runs in this process
+        if term in REGISTERED_CRNS:
+            REGISTERED_CRNS[term].update(r["crn"] for r in results if r["success"])
 
-            model = item.get('model')
-            
-            if not model:
-                log(f"CRN {crn}: Model missing, skipping")
-                continue
+    if clock is not None:
+        report_fire_accuracy(fire_at, *clock)
 
-            course_title = model.get('courseTitle', 'Unknown')
-            log(f"Got model: {course_title} ({crn})")
-
-            # Find the "Web Registered" action
-            valid_actions = model.get('registrationActions', [])
-            target_action_code = None
-            
-            print(f"Available Actions for CRN {crn}:")
-            for action in valid_actions:
-                code = action.get('courseRegistrationStatus')
-                desc = action.get('description')
-                print(f" - {desc} (Code: {code})")
-                
-                if desc and ("Web Registered" in desc or "Register" in desc):
-                    target_action_code = code
-
-            if not target_action_code:
-                target_action_code = "RW"
-                print(f"[!] Could not auto-detect register action for CRN {crn}, defaulting to 'RW'")
-            
-            model['selectedAction'] = target_action_code
-            
-            # Step 2: Immediately batch submit this single CRN
-            print(f"\n--- Submitting CRN {crn} ---")
-            log(f"Submitting {course_title} ({crn})...")
-
-            batch_payload = {
-                "uniqueSessionId": UNIQUE_SESSION_ID,
-                "create": [],
-                "update": [model],
-                "destroy": []
-            }
-            
-            submit_url = f"{BASE_URL}/classRegistration/submitRegistration/batch"
-            
-            batch_headers = HEADERS.copy()
-            batch_headers['Content-Type'] = 'application/json'
-
-            submit_resp = requests.post(submit_url, headers=batch_headers, json=batch_payload)
-            submit_resp.raise_for_status()
-            
-            result_data = submit_resp.json()
-
-            # Debug: print full response when --verbose is set
-            if args.verbose:
-                print("\n[DEBUG] Full batch response:")
-                print(json.dumps(result_data, indent=2))
-
-            success = result_data.get('success', False)
-            message = result_data.get('message', 'No message provided')
-            print(f"Global Message: {message}")
-            print(f"Success Flag: {success}")
-
-            # Check for CRN specific errors - only look at the item matching our CRN
-            updates = result_data.get('data', {}).get('update', [])
-            found_errors = False
-            found_success = False
-            
-            for update_item in updates:
-                item_crn = update_item.get('courseReferenceNumber', '')
-                # Only process the update_item for the CRN we just submitted
-                if str(item_crn) != str(crn):
-                    continue
-                
-                crn_errors = update_item.get('crnErrors', [])
-                has_crn_errors = bool(crn_errors)
+    if args.results_json:
+        write_results_json(args.results_json, term, results)
 
-                # Always log/print crnErrors if present
-                if has_crn_errors:
-                    found_errors = True
-                    for err in crn_errors:
-                        err_msg = f"{crn}: {err.get('message')}"
-                        print(f"[!] {err_msg}")
-                        log(f"[ERROR] {err_msg}")
-
-                # Process messages: if there are crnErrors, do NOT print/log success messages
-                msgs = update_item.get('messages', [])
-                for msg in msgs:
-                    msg_type = msg.get('type')
-                    msg_text = msg.get('message')
-                    if msg_type == 'error':
-                        found_errors = True
-                        print(f"[!] {course_title} ({crn}): {msg_text}")
-                        log(f"[ERROR] {crn}: {msg_text}")
-                    elif msg_type == 'success':
-                        if has_crn_errors:
-                            # Skip success messages when crnErrors exist (avoid misleading output)
-                            continue
-                        found_success = True
-                        print(f"[+] {course_title} ({crn}): {msg_text}")
-                        log(f"[SUCCESS] {course_title} ({crn}): {msg_text}")
-
-            if not found_errors and success:
-                print(f"\n[SUCCESS] CRN {crn} registered successfully!")
-                any_success = True
-            else:
-                print(f"\n[FAILED] CRN {crn} registration failed. Trying next CRN...")
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed for CRN {crn}: {e}")
-            log(f"[ERROR] CRN {crn}: Request failed - {e}")
-            continue
-        except Exception as e:
-            print(f"An error occurred for CRN {crn}: {e}")
-            log(f"[ERROR] CRN {crn}: {e}")
-            continue
+    if TIMING_ENABLED:
+        print_timing_report(handshake, warm_count=len(warm_times),
+                            hot_requests=len(REQUEST_TIMINGS) - hot_start[0],
+                            hot_connections=opened_connections(SESSION) - hot_start[1])
+    metrics.write_prometheus()
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.count} request(s) to {args.record}")
+    if replay and replay.misses:
+        print(f"Replay: {len(replay.misses)} request(s) were not in the trace:")
+        for miss in replay.misses[:10]:
+            print(f" - {miss}")
 
     # Final summary
     print(f"\n{'='*50}")
@@ -337,9 +1552,7 @@ def test_add_course():
     else:
         log("\n[DONE] No courses were successfully registered.")
         send_discord_buffer(ping_user=False)  # No ping on failure
-        
-        # Print full dump for debugging if needed
-        # print(json.dumps(result_data, indent=2))
+    return any_success
 
 if __name__ == "__main__":
     test_add_course()